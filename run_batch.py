@@ -0,0 +1,28 @@
+import argparse
+import os
+import sys
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "src")
+sys.path.insert(0, SRC_DIR)
+# Worker processes started with "spawn" need src on their path too
+os.environ["PYTHONPATH"] = os.pathsep.join(filter(None, [SRC_DIR, os.environ.get("PYTHONPATH")]))
+
+from agents.batch_runner import run_batch
+from utils.model_registry import print_startup_report
+
+if __name__ == "__main__":
+    print_startup_report("run_batch")
+    parser = argparse.ArgumentParser(description="Run Planner -> Executor -> Reporter for many validation plans headlessly.")
+    parser.add_argument("source", help="Directory of plans (<name>.json with <name>.requirements.json or a shared "
+                                       "requirements.json), or a JSON Lines file of jobs ('-' for stdin)")
+    parser.add_argument("-o", "--output", default="batch_output", help="Output directory (default: batch_output)")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="Worker processes (default: every core)")
+    parser.add_argument("--use-llm", action="store_true", help="LLM-based planning for jobs that do not set use_llm")
+    args = parser.parse_args()
+
+    results = run_batch(args.source, args.output, use_llm=args.use_llm, workers=args.workers)
+    failed = [result for result in results if result["status"] != "ok"]
+    for result in failed:
+        print(f"X {result['name']}: {result['error']}")
+    print(f"{len(results) - len(failed)}/{len(results)} jobs succeeded, outputs in {args.output}")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,170 @@
+# batch_runner.py
+import json
+import multiprocessing
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+REQUIREMENTS_SUFFIX = ".requirements.json"
+SHARED_REQUIREMENTS = "requirements.json"
+BATCH_SUMMARY_FILE = "batch_summary.json"
+
+
+def safe_name(name):
+    """File-system safe job name."""
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", str(name)).strip("_") or "job"
+
+
+def discover_jobs(source):
+    """
+    Lists the batch jobs in a directory or a JSON Lines file.
+
+    Directory: every *.json file is a validation plan, except requirements files.
+    A plan <name>.json uses <name>.requirements.json if present, otherwise the
+    directory's shared requirements.json.
+
+    JSON Lines ("-" for stdin): one object per line with "requirements" and
+    "plan", each a file path or inline JSON, plus optional "name" and "use_llm".
+
+    Returns:
+        list[dict]: Jobs with name, requirements, plan and (optionally) use_llm
+    """
+    if os.path.isdir(source):
+        jobs = []
+        shared = os.path.join(source, SHARED_REQUIREMENTS)
+        for file_name in sorted(os.listdir(source)):
+            if not file_name.endswith(".json") or file_name == SHARED_REQUIREMENTS or file_name.endswith(REQUIREMENTS_SUFFIX):
+                continue
+            name = file_name[:-len(".json")]
+            requirements = os.path.join(source, name + REQUIREMENTS_SUFFIX)
+            if not os.path.exists(requirements):
+                requirements = shared
+            jobs.append({"name": name, "plan": os.path.join(source, file_name), "requirements": requirements})
+        return jobs
+
+    stream = sys.stdin if source == "-" else open(source)
+    try:
+        jobs = []
+        for line_number, line in enumerate(stream, start=1):
+            if line.strip():
+                job = json.loads(line)
+                job.setdefault("name", f"job-{line_number}")
+                jobs.append(job)
+        return jobs
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+def _materialize(value, path):
+    """Inline JSON is written to path so the job's inputs are kept next to its outputs."""
+    if isinstance(value, str):
+        return value
+    with open(path, "w") as f:
+        json.dump(value, f, indent=4)
+    return path
+
+
+def _init_worker():
+    """Imports the agents once per worker process and reports how long that startup took."""
+    import agents.orchestrator_agent
+    from utils.model_registry import print_startup_report
+    print_startup_report(f"batch worker {os.getpid()}")
+
+
+def run_batch_job(job, output_dir, use_llm=False):
+    """
+    Runs Planner -> Executor -> Reporter for one job and writes its outputs.
+
+    Outputs in output_dir/<name>/: plan.json, results.csv and report.json
+    (summary, domain and category breakdowns, and the plan's regressions, flaky
+    tests and hotspots from the results store, which the run is appended to).
+    Jobs leave the shared semantic search index alone so parallel workers never
+    write it concurrently.
+
+    Returns:
+        dict: name, status ("ok" or "failed"), seconds, test count or error
+    """
+    from agents.orchestrator_agent import orchestrate
+    from agents.reporter_agent import summarize_results, analyze_history
+    from utils.results_store import get_results_store
+
+    name = safe_name(job.get("name", "job"))
+    job_dir = os.path.join(output_dir, name)
+    os.makedirs(job_dir, exist_ok=True)
+    start = time.perf_counter()
+    try:
+        requirements_path = _materialize(job["requirements"], os.path.join(job_dir, "requirements.json"))
+        plan_path = _materialize(job["plan"], os.path.join(job_dir, "plan_template.json"))
+        planner_output, execution_df, (summary, domain_summary, _, _), _ = orchestrate(
+            requirements_path, use_llm=job.get("use_llm", use_llm), plan_path=plan_path,
+            chart_format=None, update_index=False
+        )
+
+        with open(os.path.join(job_dir, "plan.json"), "w") as f:
+            json.dump(planner_output, f, indent=4)
+        execution_df.to_csv(os.path.join(job_dir, "results.csv"), index=False)
+        category_summary = summarize_results(execution_df).breakdown("category")
+        history = analyze_history(
+            get_results_store(), planner_output.get("testplan_id"), planner_output.get("milestone")
+        )
+        with open(os.path.join(job_dir, "report.json"), "w") as f:
+            json.dump({
+                "summary": summary,
+                "domain_summary": domain_summary.to_dict(orient="index"),
+                "category_summary": category_summary.to_dict(orient="index"),
+                "history": {name: table.to_dict(orient="records") for name, table in history.items()},
+            }, f, indent=4, default=str)
+        return {"name": name, "status": "ok", "seconds": round(time.perf_counter() - start, 2), "tests": len(execution_df)}
+    except Exception as e:
+        return {"name": name, "status": "failed", "seconds": round(time.perf_counter() - start, 2),
+                "error": f"{type(e).__name__}: {e}"}
+
+
+def run_batch(source, output_dir, use_llm=False, workers=None):
+    """
+    Runs every job from source in parallel across a process pool.
+
+    Args:
+        source (str): Directory of plans or JSON Lines file ("-" for stdin), see discover_jobs
+        output_dir (str): Root output directory, one subdirectory per job
+        use_llm (bool): Default planner strategy for jobs that do not set use_llm
+        workers (int | None): Worker processes, defaults to every core
+
+    Returns:
+        list[dict]: Per-job status in job order (also written to batch_summary.json)
+    """
+    jobs = discover_jobs(source)
+    os.makedirs(output_dir, exist_ok=True)
+    names = [safe_name(job.get("name", "job")) for job in jobs]
+    if len(set(names)) != len(names):
+        raise ValueError("Batch job names must be unique")
+
+    # Build the catalog's columnar cache, and for LLM planning its embedding store,
+    # once here; workers then only read them instead of all writing them at once
+    from utils.catalog import load_catalog
+    catalog = load_catalog()
+    if use_llm or any(job.get("use_llm") for job in jobs):
+        from agents.planner_agent import get_catalog_store
+        get_catalog_store(catalog.records, catalog_version=catalog.version)
+
+    workers = workers or os.cpu_count() or 1
+    print(f"Running {len(jobs)} jobs on {min(workers, len(jobs) or 1)} worker processes")
+    statuses = {}
+    # Spawn rather than fork: this process may already run torch or tokenizer threads
+    # (loaded above), and forking with those threads alive can deadlock the workers.
+    # Spawned workers import src through PYTHONPATH, which run_batch.py sets.
+    spawn = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, mp_context=spawn) as pool:
+        futures = {pool.submit(run_batch_job, job, output_dir, use_llm): name for job, name in zip(jobs, names)}
+        for future in as_completed(futures):
+            status = future.result()
+            statuses[futures[future]] = status
+            print(f"[{len(statuses)}/{len(jobs)}] {status['name']}: {status['status']} in {status['seconds']}s")
+
+    results = [statuses[name] for name in names]
+    with open(os.path.join(output_dir, BATCH_SUMMARY_FILE), "w") as f:
+        json.dump(results, f, indent=4)
+    return results
@@ -1,15 +1,16 @@
 # citation_agent.py
 
 import json
-from langchain_ollama import ChatOllama
-from langchain.schema import SystemMessage, HumanMessage
+from functools import lru_cache
 
-# Initialize LLM
-llm = ChatOllama(model="mistral")
+from utils.llm_cache import cached_invoke, cached_ainvoke
+from utils.async_utils import gather_bounded, LLM_MAX_CONCURRENCY, LLM_TIMEOUT_SECONDS
+from utils.model_registry import get_chat_llm
+
+# LLM: shared ChatOllama client from utils/model_registry.py (get_chat_llm), created on first call
 
 # System prompt for citation/judge agent
-system_prompt = SystemMessage(
-    content="""
+SYSTEM_PROMPT = """
     You are a validation citation and judgment agent. Your job is to assess whether the response from a Planner Agent is grounded in the provided document context.
 
     For each response, return a JSON object with:
@@ -20,21 +21,17 @@ system_prompt = SystemMessage(
 
     Respond only in valid JSON format.
     """
-)
 
-def evaluate_response(query_text, context_text, llm_response):
-    """
-    Evaluate LLM output using supporting document context.
+@lru_cache(maxsize=None)
+def get_system_prompt():
+    from langchain.schema import SystemMessage
 
-    Args:
-        query_text (str): Original requirement or user query
-        context_text (str): Retrieved document snippets (from RAG)
-        llm_response (str): Planner Agent response
+    return SystemMessage(content=SYSTEM_PROMPT)
 
-    Returns:
-        dict: Evaluation result with verdict, confidence, explanation, and citations
-    """
-    prompt = HumanMessage(
+def build_evaluation_prompt(query_text, context_text, llm_response):
+    from langchain.schema import HumanMessage
+
+    return HumanMessage(
         content=f"""
         Query:
         {query_text}
@@ -47,17 +44,56 @@ def evaluate_response(query_text, context_text, llm_response):
         """
     )
 
-    response = llm.invoke([system_prompt, prompt])
+def error_result(explanation):
+    return {
+        "verdict": "Error",
+        "confidence": 0,
+        "explanation": explanation,
+        "citations": []
+    }
+
+def is_valid_evaluation(raw_output):
+    """Whether the response is a JSON object; only such responses are cached."""
+    try:
+        return isinstance(json.loads(raw_output), dict)
+    except (TypeError, ValueError):
+        return False
 
+def parse_evaluation(raw_output):
     try:
-        return json.loads(response.content)
+        return json.loads(raw_output)
     except Exception:
-        return {
-            "verdict": "Error",
-            "confidence": 0,
-            "explanation": "Unable to parse model response.",
-            "citations": []
-        }
+        return error_result("Unable to parse model response.")
+
+def evaluate_response(query_text, context_text, llm_response):
+    """
+    Evaluate LLM output using supporting document context.
+
+    Args:
+        query_text (str): Original requirement or user query
+        context_text (str): Retrieved document snippets (from RAG)
+        llm_response (str): Planner Agent response
+
+    Returns:
+        dict: Evaluation result with verdict, confidence, explanation, and citations
+    """
+    prompt = build_evaluation_prompt(query_text, context_text, llm_response)
+    return parse_evaluation(cached_invoke(get_chat_llm(), [get_system_prompt(), prompt], validate=is_valid_evaluation))
+
+async def evaluate_response_async(query_text, context_text, llm_response):
+    """
+    Async variant of evaluate_response built on ChatOllama.ainvoke.
+    Both variants answer repeated prompts from the LLM response cache.
+    """
+    prompt = build_evaluation_prompt(query_text, context_text, llm_response)
+    return parse_evaluation(
+        await cached_ainvoke(get_chat_llm(), [get_system_prompt(), prompt], validate=is_valid_evaluation)
+    )
+
+def per_requirement_contexts(requirements, context_text):
+    if isinstance(context_text, str):
+        return [context_text] * len(requirements)
+    return context_text
 
 def batch_evaluate_responses(requirements, context_text, planner_outputs):
     """
@@ -65,18 +101,44 @@ def batch_evaluate_responses(requirements, context_text, planner_outputs):
 
     Args:
         requirements (list[str]): List of requirement texts
-        context_text (str): Shared RAG context used in reasoning
+        context_text (str | list[str]): Shared RAG context, or one context per requirement
         planner_outputs (list[str]): LLM outputs per requirement
 
     Returns:
         list[dict]: List of judgment results
     """
     results = []
-    for req, resp in zip(requirements, planner_outputs):
-        result = evaluate_response(req, context_text, resp)
+    for req, context, resp in zip(requirements, per_requirement_contexts(requirements, context_text), planner_outputs):
+        result = evaluate_response(req, context, resp)
         results.append(result)
     return results
 
+async def batch_evaluate_responses_async(requirements, context_text, planner_outputs,
+                                         max_concurrency=LLM_MAX_CONCURRENCY, timeout=LLM_TIMEOUT_SECONDS):
+    """
+    Evaluate multiple planner responses concurrently.
+
+    Args:
+        requirements (list[str]): List of requirement texts
+        context_text (str | list[str]): Shared RAG context, or one context per requirement
+        planner_outputs (list[str]): LLM outputs per requirement
+        max_concurrency (int): Maximum number of judge calls in flight
+        timeout (float | None): Seconds allowed per judge call
+
+    Returns:
+        list[dict]: Judgment results in the same order as requirements
+    """
+    results = await gather_bounded(
+        [lambda req=req, context=context, resp=resp: evaluate_response_async(req, context, resp)
+         for req, context, resp in zip(requirements, per_requirement_contexts(requirements, context_text), planner_outputs)],
+        max_concurrency=max_concurrency,
+        timeout=timeout
+    )
+    return [
+        error_result(f"Judge call failed: {type(result).__name__}") if isinstance(result, Exception) else result
+        for result in results
+    ]
+
 
 # Example usage
 if __name__ == "__main__":
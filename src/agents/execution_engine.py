@@ -0,0 +1,276 @@
+# execution_engine.py
+import abc
+import queue
+import random
+import shlex
+import subprocess
+import threading
+import time
+
+RESULTS = ["PASS", "FAIL", "SKIPPED"]
+
+# Exit code a test command uses to report itself as skipped (automake convention)
+SKIP_EXIT_CODE = 77
+
+# Tests buffered ahead of the SUT workers by run_stream
+STREAM_QUEUE_SIZE = 256
+
+
+def is_priority_domain(domain, priority_domains):
+    """True if domain is one of priority_domains or a sub-domain of one (e.g. connectivity.wifi)."""
+    domain = domain or ""
+    return any(domain == p or domain.startswith(p + ".") for p in priority_domains or [])
+
+
+def parse_time_budget_hours(value):
+    """The plan stores time_budget as a string of hours; None or "" means no budget."""
+    if value in (None, ""):
+        return None
+    return float(value)
+
+
+class SUTAdapter(abc.ABC):
+    """Runs a single test on a single SUT (system under test)."""
+
+    @abc.abstractmethod
+    def run(self, sut, test):
+        """
+        Returns:
+            dict: result ("PASS", "FAIL" or "SKIPPED") and an optional output string
+        """
+
+
+class FakeSUTAdapter(SUTAdapter):
+    """
+    Local stand-in for lab hardware: rolls a weighted random outcome,
+    optionally sleeping to mimic test duration.
+    """
+
+    def __init__(self, weights=(0.7, 0.2, 0.1), duration_seconds=0.0, seed=None):
+        self.weights = weights
+        self.duration_seconds = duration_seconds
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def run(self, sut, test):
+        if self.duration_seconds:
+            time.sleep(self.duration_seconds)
+        with self._lock:
+            result = self._random.choices(RESULTS, weights=self.weights)[0]
+        return {"result": result, "output": f"simulated on {sut}"}
+
+
+class SubprocessSUTAdapter(SUTAdapter):
+    """
+    Runs test commands through subprocess.
+
+    The command is the test's own "command" field, or command_template
+    formatted with sut, id, domain and title. The command is split into
+    arguments before formatting, so a field always stays a single argument. Exit code 0 is PASS,
+    SKIP_EXIT_CODE is SKIPPED, anything else (or a timeout) is FAIL.
+    """
+
+    def __init__(self, command_template=None, timeout_seconds=None, cwd=None):
+        self.command_template = command_template
+        self.timeout_seconds = timeout_seconds
+        self.cwd = cwd
+
+    def build_command(self, sut, test):
+        command = test.get("command") or self.command_template
+        if not command:
+            raise ValueError(f"No command for test {test.get('id')} and no command_template configured")
+        fields = {k: test.get(k, "") for k in ("id", "domain", "title")}
+        return [token.format(sut=sut, **fields) for token in shlex.split(command)]
+
+    def run(self, sut, test):
+        try:
+            completed = subprocess.run(
+                self.build_command(sut, test), cwd=self.cwd, capture_output=True, text=True,
+                timeout=self.timeout_seconds
+            )
+        except subprocess.TimeoutExpired:
+            return {"result": "FAIL", "output": f"timed out after {self.timeout_seconds}s"}
+        except (OSError, ValueError) as e:
+            return {"result": "FAIL", "output": f"{type(e).__name__}: {e}"}
+
+        if completed.returncode == 0:
+            result = "PASS"
+        elif completed.returncode == SKIP_EXIT_CODE:
+            result = "SKIPPED"
+        else:
+            result = "FAIL"
+        return {"result": result, "output": (completed.stdout + completed.stderr)[-2000:]}
+
+
+class ExecutionEngine:
+    """
+    Schedules tests onto a pool of SUTs, one worker thread per SUT.
+
+    Tests from priority_domains are dispatched first. A worker stops taking
+    new tests once time_budget_hours of wall-clock time has elapsed; tests
+    that never started are reported as SKIPPED with a note. Results are
+    yielded as soon as each test finishes.
+    """
+
+    def __init__(self, adapter, suts, time_budget_hours=None, priority_domains=()):
+        if not suts:
+            raise ValueError("ExecutionEngine needs at least one SUT")
+        self.adapter = adapter
+        self.suts = list(suts)
+        self.time_budget_seconds = None if time_budget_hours is None else time_budget_hours * 3600
+        self.priority_domains = list(priority_domains or [])
+        self._stop = threading.Event()
+
+    def stop(self):
+        """Stop dispatching new tests; running tests finish and the rest are reported as not run."""
+        self._stop.set()
+
+    def order_tests(self, tests):
+        """Priority-domain tests first, catalog order otherwise."""
+        return sorted(tests, key=lambda test: not is_priority_domain(test.get("domain"), self.priority_domains))
+
+    def _record(self, test, sut, result, duration, note=""):
+        return {
+            "id": test.get("id", ""),
+            "title": test.get("title", ""),
+            "domain": test.get("domain", ""),
+            "category": test.get("category", test.get("validation_category", "")),
+            "result": result,
+            "sut": sut,
+            "duration_seconds": duration,
+            "note": note,
+        }
+
+    def _run_test(self, sut, test, results, started_at):
+        out_of_budget = (self.time_budget_seconds is not None
+                         and time.monotonic() - started_at >= self.time_budget_seconds)
+        if self._stop.is_set() or out_of_budget:
+            note = "stopped" if self._stop.is_set() else "time budget exhausted"
+            results.put(self._record(test, None, "SKIPPED", 0.0, note))
+            return
+
+        start = time.monotonic()
+        try:
+            outcome = self.adapter.run(sut, test)
+        except Exception as e:
+            outcome = {"result": "FAIL", "output": f"adapter error: {type(e).__name__}: {e}"}
+        results.put(self._record(test, sut, outcome["result"], time.monotonic() - start, outcome.get("output", "")))
+
+    def _worker(self, sut, pending, results, started_at):
+        while True:
+            try:
+                test = pending.get_nowait()
+            except queue.Empty:
+                return
+            self._run_test(sut, test, results, started_at)
+
+    def _stream_worker(self, sut, pending, results, started_at):
+        while True:
+            _, _, test = pending.get()
+            if test is None:
+                results.put(None)
+                return
+            self._run_test(sut, test, results, started_at)
+
+    def run(self, tests, schedule=None):
+        """
+        Runs tests across the SUT pool.
+
+        Args:
+            tests (list[dict]): Tests to run; ignored when a schedule is given
+            schedule (Schedule | None): Per-SUT assignments from scheduler.schedule_tests.
+                Without one, SUTs pull from a shared queue as they free up. Tests the
+                schedule left unscheduled are not run and produce no result.
+
+        Yields:
+            dict: One result per test (id, title, domain, category, result, sut, duration_seconds, note),
+            in completion order
+        """
+        results = queue.Queue()
+        if schedule is None:
+            shared = queue.Queue()
+            for test in self.order_tests(tests):
+                shared.put(test)
+            queues = {sut: shared for sut in self.suts}
+            expected = shared.qsize()
+        else:
+            queues = {}
+            for sut in self.suts:
+                queues[sut] = queue.Queue()
+                for test in schedule.assignments.get(sut, []):
+                    queues[sut].put(test)
+            expected = sum(q.qsize() for q in queues.values())
+        started_at = time.monotonic()
+
+        workers = [
+            threading.Thread(target=self._worker, args=(sut, queues[sut], results, started_at), daemon=True)
+            for sut in self.suts
+        ]
+        for worker in workers:
+            worker.start()
+        try:
+            for _ in range(expected):
+                yield results.get()
+        finally:
+            # A consumer that stops early (closed generator) should not leave SUTs busy
+            self._stop.set()
+        for worker in workers:
+            worker.join()
+
+    def run_stream(self, tests, queue_size=STREAM_QUEUE_SIZE):
+        """
+        Runs tests across the SUT pool while they are still being produced,
+        e.g. by a planner that is still selecting tests for later requirements.
+
+        Tests are pulled from the iterable into a bounded queue, so a fast producer
+        blocks instead of buffering everything; priority-domain tests waiting in the
+        queue are dispatched first. An exception raised by the iterable is re-raised
+        once the tests already queued have finished.
+
+        Args:
+            tests (Iterable[dict]): Tests to run, consumed lazily
+            queue_size (int): Tests buffered ahead of the SUT workers
+
+        Yields:
+            dict: One result per test, in completion order (see run)
+        """
+        results = queue.Queue()
+        pending = queue.PriorityQueue(maxsize=queue_size)
+        feed_error = []
+
+        def feed():
+            try:
+                for position, test in enumerate(tests):
+                    if self._stop.is_set():
+                        break
+                    rank = 0 if is_priority_domain(test.get("domain"), self.priority_domains) else 1
+                    pending.put((rank, position, test))
+            except Exception as e:
+                feed_error.append(e)
+            finally:
+                # One end marker per worker, ordered after every real test
+                for i in range(len(self.suts)):
+                    pending.put((2, i, None))
+
+        started_at = time.monotonic()
+        threading.Thread(target=feed, daemon=True).start()
+        workers = [
+            threading.Thread(target=self._stream_worker, args=(sut, pending, results, started_at), daemon=True)
+            for sut in self.suts
+        ]
+        for worker in workers:
+            worker.start()
+        try:
+            running = len(workers)
+            while running:
+                result = results.get()
+                if result is None:
+                    running -= 1
+                else:
+                    yield result
+        finally:
+            self._stop.set()
+        for worker in workers:
+            worker.join()
+        if feed_error:
+            raise feed_error[0]
@@ -1,27 +1,139 @@
 # executor_agent.py
 import json
-import random
 import pandas as pd
 from utils.file_utils import get_data_path
+from agents.execution_engine import ExecutionEngine, FakeSUTAdapter, parse_time_budget_hours
+from agents.scheduler import schedule_tests, DEFAULT_TEST_DURATION_SECONDS
 
-def run_executor_agent(planner_output):
+def get_suts(planner_output):
+    """One SUT slot per hardware_availability entry; a single local slot if none are listed."""
+    hardware = planner_output.get("hardware_availability") or ["local"]
+    if len(set(hardware)) == len(hardware):
+        return list(hardware)
+    # Identical boards are listed once per unit, so number them to keep the slots apart
+    return [f"{name}#{i}" for i, name in enumerate(hardware, start=1)]
+
+def plan_schedule(planner_output, durations=None, default_seconds=DEFAULT_TEST_DURATION_SECONDS):
+    """
+    Assigns the plan's test catalog to its SUTs within the plan's time budget.
+
+    Args:
+        planner_output (dict): Validation plan
+        durations (dict | None): test id -> historical duration in seconds
+        default_seconds (float): Load-balancing estimate for tests without history
+
+    Returns:
+        Schedule: See scheduler.schedule_tests
+    """
+    return schedule_tests(
+        planner_output.get("test_catalog", []),
+        get_suts(planner_output),
+        time_budget_hours=parse_time_budget_hours(planner_output.get("time_budget")),
+        priority_domains=planner_output.get("priority_domains", []),
+        history=durations,
+        default_seconds=default_seconds
+    )
+
+def prepare_execution(planner_output, adapter=None, durations=None, results_store=None,
+                      default_seconds=DEFAULT_TEST_DURATION_SECONDS):
+    """
+    Builds the engine for the plan's SUTs and schedules the test catalog onto them.
+    Durations default to the plan's history in results_store; only tests with a
+    recorded duration can be dropped for not fitting the time budget, and dropped
+    tests are logged here and never run.
+
+    Returns:
+        tuple[ExecutionEngine, Schedule]: Engine and schedule for iter_executor_results
+    """
+    engine = ExecutionEngine(
+        adapter or FakeSUTAdapter(),
+        get_suts(planner_output),
+        time_budget_hours=parse_time_budget_hours(planner_output.get("time_budget")),
+        priority_domains=planner_output.get("priority_domains", [])
+    )
+    if durations is None and results_store is not None:
+        durations = results_store.durations(
+            testplan_id=planner_output.get("testplan_id"), milestone=planner_output.get("milestone")
+        )
+    schedule = plan_schedule(planner_output, durations, default_seconds)
+    print(f"Schedule: {schedule.summary()}")
+    if schedule.unscheduled:
+        print(f"X {len(schedule.unscheduled)} of {len(planner_output.get('test_catalog', []))} tests "
+              f"do not fit the time budget by their recorded durations and will not run")
+    return engine, schedule
+
+def iter_executor_results(planner_output, adapter=None, durations=None, results_store=None,
+                          default_seconds=DEFAULT_TEST_DURATION_SECONDS, prepared=None):
     """
-    Simulates test execution based on planner output (validation plan).
-    Adds simulated results to each test case from the test catalog.
+    Executes the plan's test catalog on its SUTs and yields each result as the test finishes.
+    Without an adapter, tests run on FakeSUTAdapter (simulated outcomes).
+    Tests are scheduled first (see prepare_execution, or pass its result as prepared).
+    """
+    engine, schedule = prepared or prepare_execution(
+        planner_output, adapter=adapter, durations=durations, results_store=results_store,
+        default_seconds=default_seconds
+    )
+    yield from engine.run(planner_output.get("test_catalog", []), schedule=schedule)
+
+def record_executor_results(planner_output, results_store, adapter=None, durations=None, run_ts=None):
+    """
+    Executes the plan and appends every result to the results store as it finishes,
+    without keeping the run in memory.
+
+    Args:
+        planner_output (dict): Validation plan
+        results_store (ResultsStore): Store to append to
+        adapter (SUTAdapter | None): See iter_executor_results
+        durations (dict | None): See iter_executor_results
+        run_ts (str | None): Run timestamp, defaults to now
+
+    Returns:
+        RunWriter: The closed writer (run_ts, count and path of the stored run)
+    """
+    with results_store.open_run(planner_output.get("testplan_id"), planner_output.get("milestone"), run_ts) as writer:
+        for result in iter_executor_results(planner_output, adapter=adapter, durations=durations,
+                                            results_store=results_store):
+            writer.append(result)
+    return writer
+
+def run_executor_agent(planner_output, adapter=None, durations=None, results_store=None, progress=None,
+                       default_seconds=DEFAULT_TEST_DURATION_SECONDS):
+    """
+    Executes the planner output (validation plan) on the available SUTs.
+    Adds results to each test case from the test catalog; tests dropped by the
+    scheduler (see prepare_execution) have no result row.
+    With a results_store, results are also appended to the store as they finish;
+    the run is only published if every scheduled test completed.
+    progress, if given, is called as progress(done, total, result) per finished test;
+    an exception it raises stops dispatching the remaining tests.
     Returns a pandas DataFrame.
     """
-    test_catalog = planner_output.get("test_catalog", [])
+    prepared = prepare_execution(
+        planner_output, adapter=adapter, durations=durations, results_store=results_store,
+        default_seconds=default_seconds
+    )
+    total = sum(len(tests) for tests in prepared[1].assignments.values())
+    results = iter_executor_results(planner_output, prepared=prepared)
     executed_results = []
-    for test in test_catalog:
-        result = random.choices(["PASS", "FAIL", "SKIPPED"], weights=[0.7, 0.2, 0.1])[0]
-        executed_results.append({
-            "id": test.get("id", ""),
-            "title": test.get("title", ""),
-            "domain": test.get("domain", ""),
-            "category": test.get("category", ""),
-            "result": result
-        })
-
+    writer = None
+    if results_store is not None:
+        writer = results_store.open_run(planner_output.get("testplan_id"), planner_output.get("milestone"))
+    try:
+        for result in results:
+            if writer is not None:
+                writer.append(result)
+            executed_results.append(result)
+            if progress:
+                progress(len(executed_results), total, result)
+    except BaseException:
+        # A failed or cancelled run is not published to the store
+        if writer is not None:
+            writer.abort()
+        raise
+    finally:
+        results.close()
+    if writer is not None:
+        writer.close()
     df = pd.DataFrame(executed_results)
     return df
 
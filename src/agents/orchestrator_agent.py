@@ -1,10 +1,12 @@
 # orchestrator_agent.py
+from utils.model_registry import print_startup_report
 import json
 import pandas as pd
 from agents.planner_agent import run_planner_agent
 from agents.executor_agent import run_executor_agent
 from agents.reporter_agent import run_reporter_agent, semantic_search
 from utils.file_utils import get_data_path
+from utils.results_store import get_results_store
 
 def orchestrate_planner(requirement_path: str, use_llm: bool = False) -> dict:
     """
@@ -14,30 +16,33 @@ def orchestrate_planner(requirement_path: str, use_llm: bool = False) -> dict:
     planner_output = run_planner_agent(requirement_path, use_llm=use_llm)
     return planner_output
 
-def orchestrate_executor(planner_output: dict) -> pd.DataFrame:
+def orchestrate_executor(planner_output) -> pd.DataFrame:
     """
     Orchestrates the executor agent to simulate test execution based on planner output.
+    Accepts the planner output dict or the path of a validation plan JSON file.
     Returns a pandas DataFrame with execution results.
     """
-    with open(planner_output) as f:
-        planner_output = json.load(f)
+    if isinstance(planner_output, str):
+        with open(planner_output) as f:
+            planner_output = json.load(f)
     execution_df = run_executor_agent(planner_output)
     return execution_df
 
-def orchestrate_reporter(execution_df: pd.DataFrame, query=None) -> tuple:
+def orchestrate_reporter(execution_df: pd.DataFrame, query=None, chart_format=None) -> tuple:
     """
     Orchestrates the reporter agent to generate a summary and domain breakdown from execution results.
     Returns a tuple containing:
     - Summary string
     - Domain summary DataFrame
     - Full DataFrame of execution results
-    - Base64 encoded chart image
+    - Base64 encoded chart image (None unless chart_format is "png" or "svg")
+    - Semantic search hits for query (empty without a query)
     """
-    summary, domain_summary, full_df, chart_base64 = run_reporter_agent(execution_df)
+    summary, domain_summary, full_df, chart_base64 = run_reporter_agent(execution_df, chart_format=chart_format)
     semantic_results = []
     if query:
-        semantic_results = semantic_search(domain_summary, full_df, query)
-    return summary, domain_summary, full_df, chart_base64
+        semantic_results = semantic_search(query)
+    return summary, domain_summary, full_df, chart_base64, semantic_results
 
 def orchestrate_citation(requirement_path: str, use_llm: bool = False) -> dict:
     """
@@ -61,35 +66,66 @@ def orchestrate_citation(requirement_path: str, use_llm: bool = False) -> dict:
 
     return planner_output
 
-# Serving app_dashboard.py (legacy)
-def orchestrate(requirement_path, use_llm=False, query=None):
+# Full pipeline, used by the batch runner (agents/batch_runner.py)
+def orchestrate(requirement_path, use_llm=False, query=None, plan_path=None, chart_format="png", update_index=True,
+                stream=False, results_store=None, record_results=True):
     """
     Full orchstration pipeline for Planner -> Executor -> Reporter Agents.
     Args:
-        requirement_path:
-        use_llm:
-        query:
-
-    Returns: (planner_output, execution_df, (summary, domain_df, full_df, chart)
+        requirement_path: Requirements JSON file
+        use_llm: LLM-based instead of rule-based planning
+        query: Optional semantic search over the executed tests
+        plan_path: Validation plan template, defaults to data/sample_validation_plan.json (never rewritten)
+        chart_format: "png", "svg", or None to skip the chart
+        update_index: Add the executed tests to the reporter's semantic search index
+        stream: Run the stages concurrently, streaming tests and results between them (agents/pipeline.py)
+        results_store: Store the run is appended to, defaults to the shared results_store/
+        record_results: Set to False to leave the run out of the results store
+
+    Returns: (planner_output, execution_df, (summary, domain_df, full_df, chart), semantic_results)
+        where semantic_results are the search hits for query (empty without a query)
     """
+    with open(requirement_path) as f:
+        requirements = json.load(f)
+    if record_results:
+        results_store = results_store or get_results_store()
+    else:
+        results_store = None
+
+    if stream:
+        from agents.pipeline import run_pipeline
+        planner_output, execution_df, report = run_pipeline(
+            requirements, use_llm=use_llm, plan_path=plan_path, chart_format=chart_format,
+            update_index=update_index, results_store=results_store
+        )
+        return planner_output, execution_df, report, semantic_search(query) if query else []
+
     # Run Planner Agent
-    planner_output = run_planner_agent(requirement_path, use_llm=use_llm)
+    planner_output = run_planner_agent(
+        plan_path or get_data_path("sample_validation_plan.json"), use_llm=use_llm,
+        requirements=requirements, write_plan=False
+    )
 
     # Run Executor Agent
-    execution_df = run_executor_agent(planner_output)
+    execution_df = run_executor_agent(planner_output, results_store=results_store)
 
     # Run Reporter Agent
-    summary, domain_summary, full_df, chart_base64 = run_reporter_agent(execution_df)
+    summary, domain_summary, full_df, chart_base64 = run_reporter_agent(
+        execution_df, chart_format=chart_format, update_index=update_index
+    )
 
     #Optionally perform semantic search
+    semantic_results = []
     if query:
-        semantic_results = semantic_search(domain_summary, full_df, query)
+        semantic_results = semantic_search(query)
 
-    return planner_output, execution_df, (summary, domain_summary, full_df, chart_base64)
+    return planner_output, execution_df, (summary, domain_summary, full_df, chart_base64), semantic_results
 
 if __name__ == "__main__":
+    print_startup_report("orchestrator")
+
     print("Running Planner Agent...")
-    plan, log = orchestrate_planner(get_data_path("requirements.json"), use_llm=True)
+    plan = orchestrate_planner(get_data_path("sample_validation_plan.json"), use_llm=True)
     print(f"Planner Output: {len(plan['test_catalog'])} test cases.\n")
 
     print("Running Executor Agent...")
@@ -97,6 +133,6 @@ if __name__ == "__main__":
     print(f"Executor Output: {len(execution_df)} tests.\n")
 
     print("Running Reporter Agent...")
-    summary, domain_summary, full_df, chart_base64 = orchestrate_reporter(execution_df)
+    summary, domain_summary, full_df, chart_base64, _ = orchestrate_reporter(execution_df)
     print("Reporter Output:")
     print(json.dumps(summary, indent=4))
@@ -0,0 +1,179 @@
+# pipeline.py
+import queue
+import threading
+import time
+
+import pandas as pd
+
+from agents.planner_agent import run_planner_agent
+from agents.execution_engine import ExecutionEngine, FakeSUTAdapter, parse_time_budget_hours
+from agents.executor_agent import get_suts
+from agents.reporter_agent import run_reporter_agent
+from utils.catalog import load_json_cached
+from utils.file_utils import get_data_path
+from utils.result_stats import ResultAggregator
+
+# Planned tests buffered between the planner and executor stages
+PLANNED_QUEUE_SIZE = 256
+
+_END = object()
+
+
+class PipelineStopped(Exception):
+    """Raised inside the planner stage once a later stage has stopped the pipeline."""
+
+
+def _put(stage_queue, item, stopped):
+    """Blocking put that gives up once the pipeline is stopped, so a stage never hangs on a full queue."""
+    while not stopped.is_set():
+        try:
+            stage_queue.put(item, timeout=0.1)
+            return
+        except queue.Full:
+            continue
+    raise PipelineStopped()
+
+
+def _drain(stage_queue):
+    """Yields the items of a stage queue until its end marker; re-raises an upstream stage's error."""
+    while True:
+        item = stage_queue.get()
+        if item is _END:
+            return
+        if isinstance(item, BaseException):
+            raise item
+        yield item
+
+
+def run_pipeline(requirements, use_llm=False, plan_path=None, adapter=None, max_concurrency=None,
+                 chart_format=None, update_index=True, results_store=None, progress=None):
+    """
+    Streaming Planner -> Executor -> Reporter run.
+
+    The stages run concurrently and hand data along in memory through bounded queues:
+    each requirement's selected tests go to the SUT workers as soon as it is planned,
+    and every finished test is folded into the report as it arrives. End-to-end time
+    approaches that of the slowest stage rather than the sum of all three.
+
+    The planner reports one selection per requirement in LLM mode; the rule-based
+    planner selects every test in a single pass, which is then streamed out.
+
+    Unlike the staged executor, tests are not scheduled up front: the full test list
+    is unknown until planning ends, so SUTs pull tests as they free up. No test is
+    dropped ahead of time by its recorded duration; the time budget is enforced by
+    the engine on wall-clock time instead, so with duration history a staged run
+    may drop tests that a streaming run attempts until the budget runs out.
+
+    Args:
+        requirements (list[dict]): Requirements to plan
+        use_llm (bool): LLM-based instead of rule-based planning
+        plan_path (str | None): Validation plan template, defaults to data/sample_validation_plan.json (never rewritten)
+        adapter (SUTAdapter | None): How tests run on a SUT, defaults to FakeSUTAdapter
+        max_concurrency (int | None): Concurrent LLM calls, see run_planner_agent
+        chart_format (str | None): "png", "svg", or None to skip the chart
+        update_index (bool): Add the executed tests to the reporter's semantic search index
+        results_store (ResultsStore | None): Store each result is appended to as it finishes;
+            the run is only published if the pipeline completes
+        progress (callable | None): Called as progress(done, total, result) per finished test;
+            total is None until planning is complete. An exception it raises stops the pipeline.
+
+    Returns:
+        tuple: (planner_output, execution_df, (summary, domain_df, full_df, chart))
+    """
+    plan_path = plan_path or get_data_path("sample_validation_plan.json")
+    template = load_json_cached(plan_path)
+    engine = ExecutionEngine(
+        adapter or FakeSUTAdapter(),
+        get_suts(template),
+        time_budget_hours=parse_time_budget_hours(template.get("time_budget")),
+        priority_domains=template.get("priority_domains", [])
+    )
+
+    planned = queue.Queue(maxsize=PLANNED_QUEUE_SIZE)
+    stopped = threading.Event()
+    planner_result = {}
+    start = time.perf_counter()
+
+    # === Planner stage ===
+    # In asyncio mode the planner calls emit inside its event loop, so emit must never
+    # block: it hands tests to the forwarder, which waits on the bounded queue instead.
+    # The planner keeps every selection for its output anyway, so this adds no memory.
+    handoff = queue.Queue()
+
+    def emit(done, total, partial):
+        if stopped.is_set():
+            raise PipelineStopped()
+        for test in partial.get("selected", []):
+            handoff.put(test)
+
+    def plan():
+        try:
+            planner_result["plan"] = run_planner_agent(
+                plan_path, use_llm=use_llm, max_concurrency=max_concurrency,
+                requirements=requirements, write_plan=False, progress=emit
+            )
+            planner_result["total"] = len(planner_result["plan"].get("test_catalog", []))
+            planner_result["seconds"] = time.perf_counter() - start
+            handoff.put(_END)
+        except PipelineStopped:
+            handoff.put(_END)
+        except Exception as e:
+            handoff.put(e)
+
+    def forward():
+        try:
+            while True:
+                item = handoff.get()
+                _put(planned, item, stopped)
+                if item is _END or isinstance(item, BaseException):
+                    return
+        except PipelineStopped:
+            pass
+
+    planner = threading.Thread(target=plan, name="pipeline-planner", daemon=True)
+    forwarder = threading.Thread(target=forward, name="pipeline-forwarder", daemon=True)
+    planner.start()
+    forwarder.start()
+
+    # === Executor and Reporter stages ===
+    aggregator = ResultAggregator()
+    executed_results = []
+    writer = None
+    if results_store is not None:
+        writer = results_store.open_run(template.get("testplan_id"), template.get("milestone"))
+    results = engine.run_stream(_drain(planned))
+    try:
+        for result in results:
+            if writer is not None:
+                writer.append(result)
+            aggregator.add(result)
+            executed_results.append(result)
+            if progress:
+                progress(len(executed_results), planner_result.get("total"), result)
+    except BaseException:
+        # A failed or cancelled run is not published to the store
+        if writer is not None:
+            writer.abort()
+        raise
+    finally:
+        stopped.set()
+        results.close()
+        # Wakes the forwarder and the executor's feeder if they still wait on a stopped planner
+        handoff.put(_END)
+        try:
+            planned.put_nowait(_END)
+        except queue.Full:
+            pass
+    planner.join()
+    forwarder.join()
+    if writer is not None:
+        writer.close()
+    executed_seconds = time.perf_counter() - start
+
+    execution_df = pd.DataFrame(executed_results)
+    report = run_reporter_agent(
+        execution_df, chart_format=chart_format, update_index=update_index, aggregator=aggregator
+    )
+    print(f"Pipeline: planned in {planner_result['seconds']:.2f}s, executed {len(execution_df)} tests "
+          f"by {executed_seconds:.2f}s, reported by {time.perf_counter() - start:.2f}s")
+    return planner_result["plan"], execution_df, report
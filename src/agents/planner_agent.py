@@ -1,23 +1,26 @@
 # planner_agent.py
 
 import json
+import threading
+from collections.abc import Mapping
+from functools import lru_cache
 import numpy as np
-from pathlib import Path
-from llama_index.legacy.embeddings import LangchainEmbedding, HuggingFaceEmbedding
-from sentence_transformers import SentenceTransformer, util
-from langchain_ollama import ChatOllama
-from langchain.schema import SystemMessage, HumanMessage
-from langchain.embeddings import HuggingFaceEmbeddings
-from llama_index.core import VectorStoreIndex, StorageContext, load_index_from_storage
-from llama_index.vector_stores.faiss import FaissVectorStore
-
-from agents.citation_agent import evaluate_response
+
+from utils.model_registry import get_chat_llm, LazyEmbedder, EMBED_MODEL_NAME
+from agents.citation_agent import evaluate_response, batch_evaluate_responses_async
+from utils.llm_cache import cached_invoke, cached_ainvoke, get_llm_cache
+from utils.async_utils import gather_bounded, run_async, LLM_MAX_CONCURRENCY, LLM_TIMEOUT_SECONDS
 from utils.file_utils import get_data_path
+from utils.embedding_store import EmbeddingStore, CATALOG_INDEX_DIR
+from utils.applicability_index import ApplicabilityIndex
+from utils.catalog import load_catalog, load_json_cached
 
 INDEX_DIR = "rag_index"
 
 # === Load RAG Query Engine ===
 def load_rag_query_engine():
+    from llama_index.core import StorageContext, load_index_from_storage
+
     print("Loading RAG vector index from:", INDEX_DIR)
     storage_context = StorageContext.from_defaults(persist_dir=INDEX_DIR)
     index = load_index_from_storage(storage_context)
@@ -25,28 +28,20 @@ def load_rag_query_engine():
     return query_engine
 
 # === Load RAG Context for prompting ===
-def get_rag_context():
-    print(f"Loading RAG index from {INDEX_DIR}")
+def get_rag_context(query="Validation Planning", top_k=3):
+    from rag.retriever_service import get_retriever_service
 
-    # Use the same local embedding model used during RAG ingestion
-    local_embed_model = LangchainEmbedding(
-        HuggingFaceEmbeddings(
-            model_name="BAAI/bge-base-en-v1.5"
-        )
-    )
-    storage_path = Path(INDEX_DIR)
-    if not storage_path.exists():
-        print("RAG index not found, Please run rag_pipeline.py to ingest documents.")
-        return ""
-    vector_store = FaissVectorStore.from_persist_dir(INDEX_DIR)
-    storage_context = StorageContext.from_defaults(
-        persist_dir=INDEX_DIR,
-        vector_store=vector_store
-    )
-    index = load_index_from_storage(storage_context, embed_model=local_embed_model)
-    retriever = index.as_retriever(similarity_top_k=3)
-    retrieved_nodes = retriever.retrieve("Validation Planning")
-    return "\n".join([n.text for n in retrieved_nodes])
+    # The retriever service keeps the embedding model and index loaded across runs
+    return get_retriever_service().get_context(query, top_k=top_k)
+
+def get_rag_contexts(req_texts, top_k=3):
+    """
+    Retrieves a deduplicated, token-budgeted context per requirement,
+    embedding all requirements in one batch.
+    """
+    from rag.retriever_service import get_retriever_service
+
+    return get_retriever_service().get_contexts(req_texts, top_k=top_k)
 
 
 # === Embedding Model ===
@@ -54,20 +49,51 @@ def get_rag_context():
 #    embedder = SentenceTransformer("OpenVINO/bge-base-en-v1.5-int8-ov") # TODO: To find better embedding model later
 #except Exception:
 #    print("OpenVINO model not found, falling back to default model.")
-embedder = SentenceTransformer("all-MiniLM-L6-v2")
+# Shared with the reporter through utils/model_registry.py, loaded on first encode
+embedder = LazyEmbedder(EMBED_MODEL_NAME)
+
+# === Test Catalog Embedding Store ===
+catalog_store = None
+catalog_store_version = None
+# UI jobs and the script thread may sync at once; one sync runs, the others wait for it
+catalog_store_lock = threading.Lock()
+
+def get_test_text(tc):
+    return str(tc.get("title", "")) + " " + str(tc.get("description", ""))
+
+def get_catalog_store(test_cases, catalog_version=None):
+    """
+    Returns the memory-mapped test catalog embedding store, re-encoding only
+    the test cases that were added or edited since the last sync.
+    The sync is skipped when catalog_version matches the last synced catalog.
+    """
+    global catalog_store, catalog_store_version
+    with catalog_store_lock:
+        if catalog_store is None:
+            catalog_store = EmbeddingStore(CATALOG_INDEX_DIR, embedder, EMBED_MODEL_NAME)
+        if catalog_version is None or catalog_version != catalog_store_version:
+            stats = catalog_store.sync({str(tc["id"]): get_test_text(tc) for tc in test_cases if isinstance(tc, Mapping)})
+            if any(stats.values()):
+                print(f"Test catalog embedding store synced: {stats}")
+            catalog_store_version = catalog_version
+        return catalog_store
 
 # === LLM Setup ===
-llm = ChatOllama(model="mistral")  # TODO: Evaluate "llama3" later
+# The ChatOllama client comes from utils/model_registry.py (get_chat_llm) on first LLM call
 
-system_prompt = SystemMessage(
-    content="""
+SYSTEM_PROMPT = """
     You are a validation architect planning agent.
     Given a requirement and a list of test cases, identify the most relevant and applicable test cases that would validate the requirement.
     Respond in JSON array format with at least 2 test cases with each test case containing fields: 
     id (e.g., 1111111111 or 2222222222), title, domain (e.g., power_management or connectivity.wifi), validation_category (e.g., CAT2 or CAT3).
     These fields must be derived from the list of test cases.
     """
-)
+
+@lru_cache(maxsize=None)
+def get_system_prompt():
+    from langchain.schema import SystemMessage
+
+    return SystemMessage(content=SYSTEM_PROMPT)
 
 def get_requirement_text(req):
     req_id = req.get("id", "").strip()
@@ -76,38 +102,119 @@ def get_requirement_text(req):
     parts = [f"[{req_id}]" if req_id else "", title, desc]
     return " — ".join(part for part in parts if part)
 
-def rule_based_selection(requirements, test_cases):
+# === Applicability Index ===
+applicability_index = None
+applicability_index_lock = threading.Lock()
+
+def get_applicability_index(test_cases):
+    """Returns the inverted applicability index, rebuilding it only when a different catalog is passed."""
+    global applicability_index
+    with applicability_index_lock:
+        if applicability_index is None or applicability_index.source is not test_cases:
+            applicability_index = ApplicabilityIndex(test_cases)
+        return applicability_index
+
+def rule_based_selection(requirements, test_cases, index=None, coverage=None):
+    """
+    Selects every test case sharing an applicability tag with any requirement.
+    If a coverage dict is passed, it is filled with requirement id -> covering test ids.
+    """
+    if index is None:
+        index = get_applicability_index(test_cases)
+    selected_positions, per_requirement = index.match(requirements)
+    if coverage is not None:
+        coverage.update(index.coverage(requirements, per_requirement))
     selected = []
-    required_applicability = set()
-    for req in requirements:
-        required_applicability.update(req.get("applicability", []))
-    for tc in test_cases:
-        if set(tc.get("applicability", [])) & required_applicability:
-            selected.append({
-                "id": tc["id"],
-                "title": tc["title"],
-                "domain": tc["domain"],
-                "validation_category": tc["validation_category"]
-            })
+    for position in selected_positions:
+        tc = index.test_cases[position]
+        selected.append({
+            "id": tc["id"],
+            "title": tc["title"],
+            "domain": tc["domain"],
+            "validation_category": tc["validation_category"]
+        })
     return selected
 
-def llm_based_selection(req_text, test_cases, rag_context):
+# === Batched Ranking ===
+TOP_K = 5
+MIN_SCORE = None  # Optional cosine similarity floor for candidate test cases
+
+def with_rag_context(req_text, rag_context):
     if rag_context:
-        req_text_with_rag = f"{req_text}\n\nReference Documents:\n{rag_context}"
-    else:
-        req_text_with_rag = req_text
+        return f"{req_text}\n\nReference Documents:\n{rag_context}"
+    return req_text
 
-    req_embedding = embedder.encode(req_text_with_rag, convert_to_tensor=True)
-    test_embeddings = embedder.encode(
-        [str(tc.get("title", "")) + " " + str(tc.get("description", "")) for tc in test_cases if isinstance(tc, dict)],
-        convert_to_tensor=True
+def rank_requirements(req_texts, store, top_k=TOP_K, min_score=MIN_SCORE):
+    """
+    Ranks the test catalog against every requirement in one pass.
+
+    Args:
+        req_texts (list[str]): Requirement texts (including any RAG context)
+        store (EmbeddingStore): Synced test catalog embedding store
+        top_k (int): Number of candidate test cases kept per requirement
+        min_score (float | None): Drop candidates scoring below this cosine similarity
+
+    Returns:
+        list[list[tuple[str, float]]]: Per requirement, (test id, score) pairs best first
+    """
+    if not req_texts:
+        return []
+    if not store.ids or top_k <= 0:
+        return [[] for _ in req_texts]
+
+    # All requirements are encoded in one call and scored with one matrix product
+    req_embeddings = store.encode_query(req_texts)
+    scores = req_embeddings @ store.matrix.T
+
+    k = min(top_k, scores.shape[1])
+    top_indices = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    top_scores = np.take_along_axis(scores, top_indices, axis=1)
+    order = np.argsort(-top_scores, axis=1)
+    top_indices = np.take_along_axis(top_indices, order, axis=1)
+    top_scores = np.take_along_axis(top_scores, order, axis=1)
+
+    rankings = []
+    for row_indices, row_scores in zip(top_indices, top_scores):
+        rankings.append([
+            (store.ids[i], float(score))
+            for i, score in zip(row_indices, row_scores)
+            if min_score is None or score >= min_score
+        ])
+    return rankings
+
+def llm_based_selection(req_text, test_cases, rag_context, store=None, ranked_tests=None):
+    req_text_with_rag = with_rag_context(req_text, rag_context)
+
+    if ranked_tests is None:
+        if store is None:
+            store = get_catalog_store(test_cases)
+        tests_by_id = {str(tc["id"]): tc for tc in test_cases if isinstance(tc, Mapping)}
+        ranking = rank_requirements([req_text_with_rag], store)[0]
+        ranked_tests = [tests_by_id[test_id] for test_id, _ in ranking]
+
+    raw_output = cached_invoke(
+        get_chat_llm(), [get_system_prompt(), build_selection_prompt(req_text_with_rag, ranked_tests)],
+        validate=is_valid_selection
     )
-    cosine_scores = util.cos_sim(req_embedding, test_embeddings)[0].cpu().numpy()
-    ranked_indices = np.argsort(-cosine_scores)[:5]
-    ranked_tests = [test_cases[i] for i in ranked_indices]
+    return parse_selection(raw_output)
+
+async def llm_based_selection_async(req_text, ranked_tests, rag_context):
+    """
+    Async variant of llm_based_selection built on ChatOllama.ainvoke.
+    Expects the candidate test cases to be ranked beforehand (see rank_requirements).
+    """
+    req_text_with_rag = with_rag_context(req_text, rag_context)
+    raw_output = await cached_ainvoke(
+        get_chat_llm(), [get_system_prompt(), build_selection_prompt(req_text_with_rag, ranked_tests)],
+        validate=is_valid_selection
+    )
+    return parse_selection(raw_output)
+
+def build_selection_prompt(req_text_with_rag, ranked_tests):
+    from langchain.schema import HumanMessage
 
     tc_block = "\n".join(f"{tc['id']}: {tc['title']}" for tc in ranked_tests)
-    user_prompt = HumanMessage(
+    return HumanMessage(
         content=f"""
             Requirement:
             {req_text_with_rag}
@@ -120,8 +227,14 @@ def llm_based_selection(req_text, test_cases, rag_context):
         """
     )
 
-    response = llm.invoke([system_prompt, user_prompt])
-    raw_output = response.content
+def is_valid_selection(raw_output):
+    """Whether parse_selection can read the response; only such responses are cached."""
+    try:
+        return isinstance(json.loads(raw_output), (list, dict))
+    except (TypeError, ValueError):
+        return False
+
+def parse_selection(raw_output):
     print("\n>> Raw LLM Response:\n", raw_output)
 
     try:
@@ -136,43 +249,134 @@ def llm_based_selection(req_text, test_cases, rag_context):
         print("X Failed to parse LLM response:", e)
         return []
 
-def run_planner_agent(validation_plan_path, use_llm=False):
-    with open(get_data_path("requirements.json")) as f:
-        requirements_data = json.load(f)
+async def plan_with_llm_async(req_texts, ranked_tests_per_req, rag_contexts,
+                              max_concurrency=LLM_MAX_CONCURRENCY, timeout=LLM_TIMEOUT_SECONDS, progress=None):
+    """
+    Runs LLM selection and citation judging for every requirement concurrently.
+
+    If progress is given, it is called as progress(done, total, partial) as each
+    selection completes. An exception raised by progress (e.g. a cancelled job)
+    stops calls that have not started yet and is re-raised.
 
-    with open(get_data_path("tcd_baseline.json")) as f:
-        all_test_cases = json.load(f)
+    Returns:
+        tuple[list[list[dict]], list[dict]]: Selections and citations, in requirement order
+    """
+    total = len(req_texts)
+    done = 0
+    aborted = []
+
+    async def select(req_text, ranked_tests, rag_context):
+        nonlocal done
+        if aborted:
+            raise aborted[0]
+        selected = await llm_based_selection_async(req_text, ranked_tests, rag_context)
+        done += 1
+        if progress:
+            try:
+                progress(done, total, {"requirement": req_text, "selected": selected})
+            except Exception as e:
+                aborted.append(e)
+                raise
+        return selected
+
+    results = await gather_bounded(
+        [lambda req_text=req_text, ranked_tests=ranked_tests, rag_context=rag_context:
+         select(req_text, ranked_tests, rag_context)
+         for req_text, ranked_tests, rag_context in zip(req_texts, ranked_tests_per_req, rag_contexts)],
+        max_concurrency=max_concurrency,
+        timeout=timeout
+    )
+    if aborted:
+        raise aborted[0]
+    selections = []
+    for req_text, result in zip(req_texts, results):
+        if isinstance(result, Exception):
+            print(f"X LLM selection failed for requirement {req_text[:60]!r}: {type(result).__name__}")
+            result = []
+        selections.append(result)
+
+    citations = await batch_evaluate_responses_async(
+        req_texts, rag_contexts, [json.dumps(selected) for selected in selections],
+        max_concurrency=max_concurrency, timeout=timeout
+    )
+    return selections, citations
+
+def run_planner_agent(validation_plan_path, use_llm=False, top_k=TOP_K, min_score=MIN_SCORE,
+                      max_concurrency=None, llm_timeout=LLM_TIMEOUT_SECONDS, requirements=None, write_plan=True,
+                      progress=None):
+    """
+    Selects test cases for the requirements and writes them into the validation plan.
+
+    With use_llm, max_concurrency switches the LLM selection and citation calls
+    from one-at-a-time to asyncio mode with at most that many calls in flight.
+    Requirements are read from data/requirements.json unless passed in memory;
+    with write_plan=False the validation plan file is only read, never rewritten.
+    progress, if given, is called as progress(done, total, partial) after each
+    requirement is planned; an exception it raises aborts the run.
+    """
+    if requirements is None:
+        requirements = load_json_cached(get_data_path("requirements.json"))
+    requirements_data = requirements
+    catalog = load_catalog()
+    all_test_cases = catalog.records
 
     with open(validation_plan_path) as f:
         validation_plan = json.load(f)
 
     all_selected = []
     all_citations = []
-    rag_context = get_rag_context() if use_llm else ""
 
     if use_llm:
-        for req in requirements_data:
-            req_text = get_requirement_text(req)
-            selected = llm_based_selection(req_text, all_test_cases, rag_context)
-            print("Selected from LLM:", selected)
-            all_selected.extend(selected)
-
-            # Evaluate citations
-            citation = evaluate_response(req_text, rag_context, json.dumps(selected))
-            all_citations.append(citation)
+        validation_plan.pop("coverage", None)
+        store = get_catalog_store(all_test_cases, catalog_version=catalog.version)
+        tests_by_id = catalog.by_id
+        req_texts = [get_requirement_text(req) for req in requirements_data]
+        rag_contexts = get_rag_contexts(req_texts)
+        rankings = rank_requirements(
+            [with_rag_context(req_text, rag_context) for req_text, rag_context in zip(req_texts, rag_contexts)],
+            store, top_k=top_k, min_score=min_score
+        )
+        ranked_tests_per_req = [[tests_by_id[test_id] for test_id, _ in ranking] for ranking in rankings]
+
+        if max_concurrency:
+            selections, all_citations = run_async(plan_with_llm_async(
+                req_texts, ranked_tests_per_req, rag_contexts,
+                max_concurrency=max_concurrency, timeout=llm_timeout, progress=progress
+            ))
+            for selected in selections:
+                print("Selected from LLM:", selected)
+                all_selected.extend(selected)
+        else:
+            for req_text, ranked_tests, rag_context in zip(req_texts, ranked_tests_per_req, rag_contexts):
+                selected = llm_based_selection(req_text, all_test_cases, rag_context, ranked_tests=ranked_tests)
+                print("Selected from LLM:", selected)
+                all_selected.extend(selected)
+
+                # Evaluate citations
+                citation = evaluate_response(req_text, rag_context, json.dumps(selected))
+                all_citations.append(citation)
+                if progress:
+                    progress(len(all_citations), len(req_texts),
+                             {"requirement": req_text, "selected": selected, "citation": citation})
     else:
-        all_selected = rule_based_selection(requirements_data, all_test_cases)
+        coverage = {}
+        all_selected = rule_based_selection(requirements_data, all_test_cases, coverage=coverage)
+        validation_plan["coverage"] = coverage
         if "citations" in validation_plan:
             del validation_plan["citations"]
+        if progress:
+            progress(len(requirements_data), len(requirements_data), {"selected": all_selected})
 
     validation_plan["test_catalog"] = all_selected
     print(" Final test_catalog before writing to json: ", validation_plan["test_catalog"])
 
     if use_llm:
         validation_plan["citations"] = all_citations
+        print("LLM response cache:", get_llm_cache().stats())
 
-    with open(validation_plan_path, "w") as f:
-        json.dump(validation_plan, f, indent=4)
+    if write_plan:
+        with open(validation_plan_path, "w") as f:
+            json.dump(validation_plan, f, indent=4)
 
 
     return validation_plan
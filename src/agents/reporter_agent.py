@@ -1,68 +1,133 @@
 # reporter_agent.py
 import json
 import pandas as pd
-from sentence_transformers import SentenceTransformer
+from utils.model_registry import LazyEmbedder, EMBED_MODEL_NAME
 from utils.file_utils import get_data_path
-import faiss
-import matplotlib.pyplot as plt
+from utils.results_index import ResultsIndex
+from utils.result_stats import ResultAggregator
+from collections import OrderedDict
+import hashlib
 import io
 import base64
-import streamlit as st
+import threading
 
-model = SentenceTransformer("all-MiniLM-L6-v2")
+# Shared with the planner through utils/model_registry.py, loaded on first encode
+model = LazyEmbedder(EMBED_MODEL_NAME)
 
-def run_reporter_agent(execution_df):
+CHART_FORMATS = ("png", "svg")
+CHART_CACHE_SIZE = 32
+
+_results_index = None
+_results_index_lock = threading.Lock()
+_chart_cache = OrderedDict()
+
+def get_results_index():
+    """Process-wide persistent results index (see utils/results_index.py)."""
+    global _results_index
+    with _results_index_lock:
+        if _results_index is None:
+            _results_index = ResultsIndex(model, EMBED_MODEL_NAME)
+    return _results_index
+
+def summarize_results(execution_df, aggregator=None):
     """
-    Analyzes the test execution DataFrame and summarizes results.
-    Returns summary statistic, domain breakdown, chart image, and the DataFrame.
+    Folds execution results into a ResultAggregator in a single pass.
+    Pass an existing aggregator to keep a running summary across batches of results.
+    Category breakdown: summarize_results(df).breakdown("category").
     """
-    summary = {
-        "total": len(execution_df),
-        "passed": (execution_df["result"] == "PASS").sum(),
-        "failed": (execution_df["result"] == "FAIL").sum(),
-        "skipped": (execution_df["result"] == "SKIPPED").sum()
-    }
+    return (aggregator or ResultAggregator()).update(execution_df)
 
-    summary["pass_rate"] = (summary["passed"] / summary["total"]) * 100 if summary["total"] > 0 else 0
-    summary["fail_rate"] = (summary["failed"] / summary["total"]) * 100 if summary["total"] > 0 else 0
-    summary["skip_rate"] = (summary["skipped"] / summary["total"]) * 100 if summary["total"] > 0 else 0
+def render_summary_chart(summary, chart_format="png", dpi=100):
+    """
+    Renders the pass/fail/skip bar chart, base64-encoded.
 
-    domain_summary = execution_df.groupby(["domain", "result"]).size().unstack(fill_value=0)
+    matplotlib is imported on first use only, and charts are cached by a hash of
+    the plotted counts, so repeated reports of the same summary are not re-rendered.
 
-    descriptions = execution_df["title"].fillna("").tolist()
-    embeddings = model.encode(descriptions, convert_to_numpy=True)
-    index = faiss.IndexFlatL2(embeddings.shape[1])
-    index.add(embeddings)
+    Args:
+        summary (dict): Summary from run_reporter_agent
+        chart_format (str): "png", or "svg" for vector output
+        dpi (int): PNG resolution; lower values give smaller images
 
-    # Generate summary chart
-    fig, ax = plt.subplots()
+    Returns:
+        str: Base64 encoded image
+    """
+    if chart_format not in CHART_FORMATS:
+        raise ValueError(f"Unsupported chart format '{chart_format}', expected one of {CHART_FORMATS}")
     labels = ["passed", "failed", "skipped"]
-    values = [summary[label] for label in labels]
+    values = [int(summary[label]) for label in labels]
+    key = hashlib.sha1(json.dumps([values, chart_format, dpi]).encode("utf-8")).hexdigest()
+    if key in _chart_cache:
+        _chart_cache.move_to_end(key)
+        return _chart_cache[key]
+
+    # Figure without pyplot: no GUI backend and no global figure state
+    from matplotlib.figure import Figure
+
+    fig = Figure()
+    ax = fig.subplots()
     ax.bar(labels, values, color=['green', 'red', 'gray'])
     ax.set_title("Validation Summary")
     ax.set_ylabel("Number of Tests")
 
     buf = io.BytesIO()
-    plt.savefig(buf, format="png")
-    buf.seek(0)
-    chart_base64 = base64.b64encode(buf.read()).decode("utf-8")
-    plt.close()
+    fig.savefig(buf, format=chart_format, dpi=dpi)
+    chart_base64 = base64.b64encode(buf.getvalue()).decode("utf-8")
+
+    _chart_cache[key] = chart_base64
+    if len(_chart_cache) > CHART_CACHE_SIZE:
+        _chart_cache.popitem(last=False)
+    return chart_base64
+
+def run_reporter_agent(execution_df, chart_format="png", update_index=True, aggregator=None):
+    """
+    Analyzes the test execution DataFrame and summarizes results.
+    Returns summary statistic, domain breakdown, chart image, and the DataFrame.
+    The chart is rendered only if chart_format is set ("png" or "svg"); with None it is None.
+    update_index=False leaves the semantic search index untouched (no embedder is loaded).
+    Pass an aggregator that has already folded in every result (streamed reporting) to skip re-summarizing.
+    """
+    stats = aggregator if aggregator is not None else summarize_results(execution_df)
+    summary = stats.summary()
+    domain_summary = stats.breakdown("domain")
+
+    # Only new or retitled tests are encoded; the rest reuse stored embeddings
+    if update_index:
+        get_results_index().update(execution_df)
+
+    # Generate summary chart
+    chart_base64 = render_summary_chart(summary, chart_format) if chart_format else None
 
     return summary, domain_summary, execution_df, chart_base64
 
-def semantic_search(index, df, query, k=3):
-    query_vector = model.encode([query], convert_to_numpy=True)
-    D, I = index.search(query_vector, k)
-    matches = []
-    for i in I[0]:
-        row = df.iloc[i]
-        matches.append({
-            "id": row["id"],
-            "title": row["title"],
-            "domain": row["domain"],
-            "result": row["result"]
-        })
-    return matches
+def analyze_history(results_store, testplan_id=None, milestone=None, window=20):
+    """
+    Flags regressions, flaky tests and defect hotspots from the stored run history.
+
+    Args:
+        results_store (ResultsStore): Store the executor appends runs to
+        testplan_id (str | None): Restrict to one test plan
+        milestone (str | None): Restrict to one milestone
+        window (int): Number of most recent runs for flakiness and hotspots
+
+    Returns:
+        dict: "regressions", "flaky" and "hotspots" DataFrames
+    """
+    from utils.run_history import load_run_history
+
+    history = load_run_history(results_store, testplan_id, milestone)
+    return {
+        "regressions": history.transitions(),
+        "flaky": history.flakiness(window),
+        "hotspots": history.hotspots(window),
+    }
+
+def semantic_search(query, k=3):
+    """
+    Searches executed tests by title.
+    Returns up to k matches with their latest result and result history.
+    """
+    return get_results_index().search(query, k)
 
 if __name__ == "__main__":
     from executor_agent import run_executor_agent
@@ -71,8 +136,8 @@ if __name__ == "__main__":
 
     plan = run_planner_agent(get_data_path("sample_validation_plan.json"))
     df = run_executor_agent(plan)
-    summary, domain_summary, full_df, chart = run_reporter_agent(df)
+    summary, domain_summary, full_df, _ = run_reporter_agent(df, chart_format=None)
     pprint(summary)
     pprint(domain_summary)
-    matches = semantic_search(domain_summary, full_df, "power test failures")
+    matches = semantic_search("power test failures")
     pprint(matches)
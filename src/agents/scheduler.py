@@ -0,0 +1,111 @@
+# scheduler.py
+import heapq
+
+from agents.execution_engine import is_priority_domain
+
+# Default estimate for tests with no recorded duration; only used to balance SUT loads
+DEFAULT_TEST_DURATION_SECONDS = 3600.0
+
+
+class Schedule:
+    """
+    Assignment of tests to SUT slots.
+
+    Attributes:
+        assignments (dict): SUT -> tests in the order they should run
+        loads (dict): SUT -> estimated busy time in seconds
+        unscheduled (list[dict]): Tests with recorded durations that did not fit the time budget
+        durations (dict): test id -> duration estimate used for planning
+        estimated (set): ids of the tests without a recorded duration (default estimate)
+    """
+
+    def __init__(self, assignments, loads, unscheduled, durations, estimated=()):
+        self.assignments = assignments
+        self.loads = loads
+        self.unscheduled = unscheduled
+        self.durations = durations
+        self.estimated = set(estimated)
+
+    @property
+    def makespan(self):
+        return max(self.loads.values(), default=0.0)
+
+    def summary(self):
+        return {
+            "scheduled": sum(len(tests) for tests in self.assignments.values()),
+            "unscheduled": len(self.unscheduled),
+            "without_history": len(self.estimated),
+            "makespan_hours": round(self.makespan / 3600, 2),
+            "unscheduled_ids": [test.get("id") for test in self.unscheduled],
+        }
+
+
+def estimate_durations(tests, history=None, default_seconds=DEFAULT_TEST_DURATION_SECONDS):
+    """
+    Duration estimate for each test.
+
+    Args:
+        tests (list[dict]): Test catalog
+        history (dict | None): test id -> historical duration in seconds
+        default_seconds (float): Estimate for tests with no history
+
+    Returns:
+        dict: test id -> seconds
+    """
+    history = history or {}
+    return {test.get("id"): float(history.get(test.get("id"), default_seconds)) for test in tests}
+
+
+def schedule_tests(tests, suts, time_budget_hours=None, priority_domains=(), history=None,
+                   default_seconds=DEFAULT_TEST_DURATION_SECONDS):
+    """
+    Assigns tests to SUTs with the LPT (longest processing time first) heuristic.
+
+    Priority-domain tests are placed first, then everything else; within each
+    group the longest test goes to the least loaded SUT. The time budget is only
+    enforced with recorded durations: a test with history that would push even the
+    least loaded SUT's recorded load past the budget is left unscheduled, while
+    tests without history are always scheduled (their default estimate only
+    balances the loads). Runs in O(n log n + n log m) for n tests on m SUTs.
+
+    Args:
+        tests (list[dict]): Selected test catalog
+        suts (list[str]): SUT slots
+        time_budget_hours (float | None): Per-SUT budget, None for unlimited
+        priority_domains (list[str]): Domains to schedule first (sub-domains included)
+        history (dict | None): test id -> historical duration in seconds
+        default_seconds (float): Estimate for tests with no history
+
+    Returns:
+        Schedule: Per-SUT assignments, loads and the tests that did not fit
+    """
+    if not suts:
+        raise ValueError("schedule_tests needs at least one SUT")
+    history = history or {}
+    durations = estimate_durations(tests, history, default_seconds)
+    estimated = {test.get("id") for test in tests if test.get("id") not in history}
+    budget = None if time_budget_hours is None else time_budget_hours * 3600
+
+    priority, rest = [], []
+    for test in tests:
+        (priority if is_priority_domain(test.get("domain"), priority_domains) else rest).append(test)
+
+    assignments = {sut: [] for sut in suts}
+    heap = [(0.0, i) for i in range(len(suts))]
+    # Busy time from recorded durations only, which is what the budget is checked against
+    recorded_loads = [0.0] * len(suts)
+    unscheduled = []
+    for group in (priority, rest):
+        for test in sorted(group, key=lambda t: durations[t.get("id")], reverse=True):
+            duration = durations[test.get("id")]
+            load, i = heap[0]
+            if test.get("id") not in estimated:
+                if budget is not None and recorded_loads[i] + duration > budget:
+                    unscheduled.append(test)
+                    continue
+                recorded_loads[i] += duration
+            assignments[suts[i]].append(test)
+            heapq.heapreplace(heap, (load + duration, i))
+
+    loads = {suts[i]: load for load, i in heap}
+    return Schedule(assignments, loads, unscheduled, durations, estimated)
@@ -0,0 +1,218 @@
+# index_factory.py
+import time
+import numpy as np
+import faiss
+
+# Supported FAISS index types for the RAG vector store
+INDEX_TYPES = ("flat", "ivf_flat", "ivf_pq", "hnsw")
+
+DEFAULT_INDEX_PARAMS = {
+    "ivf_flat": {"nlist": 1024},
+    "ivf_pq": {"nlist": 1024, "pq_m": 16, "pq_nbits": 8},
+    "hnsw": {"hnsw_m": 32, "ef_construction": 200},
+}
+
+DEFAULT_SEARCH_PARAMS = {"nprobe": 16, "ef_search": 64}
+
+# FAISS wants ~39 training points per IVF centroid
+MIN_POINTS_PER_CENTROID = 39
+
+
+def resolve_index_params(index_type, index_params=None):
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown FAISS index type '{index_type}', expected one of {INDEX_TYPES}")
+    params = dict(DEFAULT_INDEX_PARAMS.get(index_type, {}))
+    params.update(index_params or {})
+    return params
+
+
+def create_faiss_index(dim, index_type="flat", index_params=None, training_vectors=None):
+    """
+    Creates (and trains, if needed) an empty FAISS index.
+
+    Args:
+        dim (int): Embedding dimension
+        index_type (str): "flat", "ivf_flat", "ivf_pq" or "hnsw"
+        index_params (dict | None): Overrides for DEFAULT_INDEX_PARAMS
+        training_vectors (np.ndarray | None): Sample of the corpus used to train IVF indexes
+
+    Returns:
+        faiss.Index: An index ready to receive vectors. IVF types fall back to a
+        flat index when there are too few training vectors for the requested nlist.
+    """
+    params = resolve_index_params(index_type, index_params)
+
+    if index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, params["hnsw_m"])
+        index.hnsw.efConstruction = params["ef_construction"]
+        return index
+
+    if index_type in ("ivf_flat", "ivf_pq"):
+        n_train = 0 if training_vectors is None else len(training_vectors)
+        nlist = min(params["nlist"], n_train // MIN_POINTS_PER_CENTROID)
+        if nlist < 1 or (index_type == "ivf_pq" and n_train < 2 ** params["pq_nbits"]):
+            print(f"Only {n_train} training vectors, falling back to a flat index instead of {index_type}.")
+            return faiss.IndexFlatL2(dim)
+        if nlist < params["nlist"]:
+            print(f"Reducing nlist from {params['nlist']} to {nlist} for {n_train} training vectors.")
+
+        quantizer = faiss.IndexFlatL2(dim)
+        if index_type == "ivf_flat":
+            index = faiss.IndexIVFFlat(quantizer, dim, nlist)
+        else:
+            index = faiss.IndexIVFPQ(quantizer, dim, nlist, params["pq_m"], params["pq_nbits"])
+        index.train(np.ascontiguousarray(training_vectors, dtype=np.float32))
+        return index
+
+    return faiss.IndexFlatL2(dim)
+
+
+def apply_search_params(index, nprobe=None, ef_search=None):
+    """Sets query-time parameters on IVF (nprobe) and HNSW (efSearch) indexes. Others are left untouched."""
+    try:
+        ivf = faiss.extract_index_ivf(index)
+    except RuntimeError:
+        ivf = None
+    if ivf is not None and nprobe is not None:
+        ivf.nprobe = min(nprobe, ivf.nlist)
+    if hasattr(index, "hnsw") and ef_search is not None:
+        index.hnsw.efSearch = ef_search
+
+
+def describe_index(index):
+    """
+    Type and parameters of a built index, read from the index itself.
+
+    Returns:
+        tuple[str, dict, dict]: index type (one of INDEX_TYPES), build parameters and
+        the search parameters in effect (nprobe / ef_search, where they apply)
+    """
+    try:
+        ivf = faiss.extract_index_ivf(index)
+    except RuntimeError:
+        ivf = None
+    if ivf is not None:
+        ivf = faiss.downcast_index(ivf)
+        search = {"nprobe": ivf.nprobe}
+        if isinstance(ivf, faiss.IndexIVFPQ):
+            return "ivf_pq", {"nlist": ivf.nlist, "pq_m": ivf.pq.M, "pq_nbits": ivf.pq.nbits}, search
+        return "ivf_flat", {"nlist": ivf.nlist}, search
+    if hasattr(index, "hnsw"):
+        return "hnsw", {"hnsw_m": index.hnsw.nb_neighbors(1), "ef_construction": index.hnsw.efConstruction}, \
+            {"ef_search": index.hnsw.efSearch}
+    return "flat", {}, {}
+
+
+def reconstruct_vectors(index, positions=None):
+    """Returns the stored vectors at the given positions (all of them by default)."""
+    try:
+        faiss.extract_index_ivf(index).make_direct_map()
+    except RuntimeError:
+        pass
+    if positions is None:
+        return index.reconstruct_n(0, index.ntotal)
+    positions = np.asarray(positions, dtype=np.int64)
+    if len(positions) == 0:
+        return np.empty((0, index.d), dtype=np.float32)
+    return index.reconstruct_batch(positions)
+
+
+def compact_index(index, removed_positions):
+    """
+    Removes vectors and compacts the remaining ones to positions 0..n-1.
+
+    IndexFlat supports this natively. IVF indexes keep holes on removal and
+    HNSW cannot remove at all, so those are rebuilt from their surviving
+    vectors, reusing the trained quantizer.
+
+    Returns:
+        faiss.Index: The compacted index (the same object for flat indexes)
+    """
+    removed_positions = np.asarray(removed_positions, dtype=np.int64)
+    if isinstance(index, faiss.IndexFlat):
+        index.remove_ids(removed_positions)
+        return index
+
+    keep = np.setdiff1d(np.arange(index.ntotal, dtype=np.int64), removed_positions)
+    kept_vectors = reconstruct_vectors(index, keep)
+    compacted = faiss.clone_index(index)
+    compacted.reset()
+    if len(kept_vectors):
+        compacted.add(kept_vectors)
+    return compacted
+
+
+def benchmark_index_configs(vectors, configs, n_queries=200, k=10, train_size=50000, seed=0):
+    """
+    Recall-versus-latency report of candidate index configs against the flat baseline.
+
+    Args:
+        vectors (np.ndarray): Corpus embeddings (e.g. reconstruct_vectors of the persisted index)
+        configs (list[dict]): Each with "index_type" and optional "index_params", "nprobe", "ef_search"
+        n_queries (int): Number of corpus vectors sampled as queries
+        k (int): Recall is measured as overlap@k with exact search
+        train_size (int): Maximum number of vectors sampled for IVF training
+
+    Returns:
+        list[dict]: One row per config with recall@k, mean query latency in ms and build time.
+        index_type, index_params, nprobe and ef_search describe the index actually built
+        (see describe_index), which differs from requested_index_type / requested_params
+        when create_faiss_index reduced nlist or fell back to a flat index.
+    """
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    rng = np.random.default_rng(seed)
+    queries = vectors[rng.choice(len(vectors), size=min(n_queries, len(vectors)), replace=False)]
+    training = vectors[rng.choice(len(vectors), size=min(train_size, len(vectors)), replace=False)]
+    k = min(k, len(vectors))
+
+    baseline = faiss.IndexFlatL2(vectors.shape[1])
+    baseline.add(vectors)
+    _, truth = baseline.search(queries, k)
+
+    report = []
+    for config in [{"index_type": "flat"}] + list(configs):
+        start = time.perf_counter()
+        index = create_faiss_index(vectors.shape[1], config["index_type"], config.get("index_params"), training)
+        index.add(vectors)
+        build_seconds = time.perf_counter() - start
+        apply_search_params(index, config.get("nprobe"), config.get("ef_search"))
+
+        start = time.perf_counter()
+        _, found = index.search(queries, k)
+        query_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+        hits = sum(len(set(f) & set(t)) for f, t in zip(found, truth))
+        index_type, index_params, search_params = describe_index(index)
+        report.append({
+            "index_type": index_type,
+            "index_params": index_params,
+            "nprobe": search_params.get("nprobe"),
+            "ef_search": search_params.get("ef_search"),
+            "requested_index_type": config["index_type"],
+            "requested_params": resolve_index_params(config["index_type"], config.get("index_params")),
+            f"recall@{k}": hits / truth.size,
+            "query_ms": query_ms,
+            "build_seconds": build_seconds,
+        })
+    return report
+
+
+if __name__ == "__main__":
+    import sys
+    from rag.rag_pipeline import INDEX_PATH
+    from llama_index.vector_stores.faiss import FaissVectorStore
+
+    persist_path = sys.argv[1] if len(sys.argv) > 1 else INDEX_PATH
+    vector_store = FaissVectorStore.from_persist_dir(persist_path)
+    corpus = reconstruct_vectors(vector_store.client)
+    print(f"Benchmarking {len(corpus)} vectors from {persist_path}")
+
+    candidates = (
+        [{"index_type": "ivf_flat", "nprobe": nprobe} for nprobe in (1, 8, 32)]
+        + [{"index_type": "ivf_pq", "nprobe": nprobe} for nprobe in (8, 32)]
+        + [{"index_type": "hnsw", "ef_search": ef} for ef in (16, 64, 256)]
+    )
+    for row in benchmark_index_configs(corpus, candidates):
+        recall_key = next(key for key in row if key.startswith("recall@"))
+        print(f"{row['requested_index_type']:>9} -> {row['index_type']} {row['index_params']}  nprobe={row['nprobe']}  ef_search={row['ef_search']}  "
+              f"{recall_key}={row[recall_key]:.3f}  query={row['query_ms']:.3f}ms  build={row['build_seconds']:.1f}s")
@@ -1,39 +1,147 @@
 import os
-#import json
-from llama_index.core import SimpleDirectoryReader, VectorStoreIndex
+import json
+import hashlib
+import random
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+import numpy as np
+from llama_index.core import SimpleDirectoryReader, VectorStoreIndex, load_index_from_storage
+from llama_index.core.schema import MetadataMode
 from llama_index.embeddings.huggingface import HuggingFaceEmbedding
 from llama_index.vector_stores.faiss import FaissVectorStore
 from llama_index.core.node_parser import SentenceSplitter
 from llama_index.core.storage.storage_context import StorageContext
-from faiss import IndexFlatL2
+
+from utils.model_registry import print_startup_report
+from rag.index_factory import (
+    create_faiss_index, apply_search_params, compact_index, resolve_index_params, DEFAULT_SEARCH_PARAMS
+)
 
 # Configuration
 DOCS_PATH = "docs/internal_guides"
 INDEX_PATH = "rag_index"
 EMBED_MODEL_NAME = "BAAI/bge-base-en-v1.5"
+MANIFEST_FILE = "ingest_manifest.json"
+
+# FAISS index: "flat" (exact), "ivf_flat", "ivf_pq" or "hnsw" (see rag/index_factory.py)
+INDEX_TYPE = "flat"
+INDEX_PARAMS = {}
+SEARCH_PARAMS = dict(DEFAULT_SEARCH_PARAMS)
+TRAIN_SAMPLE_SIZE = 50000
+
+# Parallel ingestion
+PARSE_WORKERS = os.cpu_count() or 1
+EMBED_BATCH_SIZE = 256
 
 # 1. Load and parse internal documents
-def load_and_split_documents(docs_path=DOCS_PATH):
-    print("Loading internal documents from:", docs_path)
-    documents = SimpleDirectoryReader(input_dir=docs_path).load_data()
+def load_and_split_documents(docs_path=DOCS_PATH, input_files=None):
+    if input_files is None:
+        print("Loading internal documents from:", docs_path)
+        documents = SimpleDirectoryReader(input_dir=docs_path).load_data()
+    else:
+        print(f"Loading {len(input_files)} new or changed documents from:", docs_path)
+        documents = SimpleDirectoryReader(input_files=input_files).load_data()
     parser = SentenceSplitter()
     nodes = parser.get_nodes_from_documents(documents)
     return nodes
 
+def parse_file(path):
+    """
+    Parses and chunks a single document (runs in a worker process).
+
+    Returns:
+        tuple[str, list, str | None]: path, nodes, and an error message if parsing failed
+    """
+    try:
+        documents = SimpleDirectoryReader(input_files=[path], raise_on_error=True).load_data()
+        return path, SentenceSplitter().get_nodes_from_documents(documents), None
+    except Exception as e:
+        return path, [], f"{type(e).__name__}: {e}"
+
+def iter_node_batches(paths, batch_size=EMBED_BATCH_SIZE, workers=PARSE_WORKERS, on_parsed=None, on_failed=None):
+    """
+    Parses and chunks documents in a process pool and yields their nodes in fixed-size batches.
+
+    At most 2 * workers files are in flight, so parsed-but-unembedded nodes never
+    pile up beyond a few files plus one batch.
+
+    Args:
+        paths (list[str]): Documents to parse
+        batch_size (int): Number of nodes per yielded batch
+        workers (int): Number of parser processes
+        on_parsed (callable | None): Called with (path, node ids) once a file is parsed,
+            before any of its nodes are yielded
+        on_failed (callable | None): Called with (path, error message) for files that failed to parse
+
+    Yields:
+        list: Up to batch_size nodes, in the order the files finished parsing
+    """
+    pending_paths = iter(paths)
+    buffer = []
+
+    with ProcessPoolExecutor(max_workers=max(1, workers)) as pool:
+        in_flight = set()
+        while True:
+            for path in pending_paths:
+                in_flight.add(pool.submit(parse_file, path))
+                if len(in_flight) >= 2 * max(1, workers):
+                    break
+            if not in_flight:
+                break
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                path, nodes, error = future.result()
+                if error:
+                    print(f"X Failed to parse {path}: {error}")
+                    if on_failed:
+                        on_failed(path, error)
+                    continue
+                if on_parsed:
+                    on_parsed(path, [node.node_id for node in nodes])
+                buffer.extend(nodes)
+            while len(buffer) >= batch_size:
+                yield buffer[:batch_size]
+                buffer = buffer[batch_size:]
+    if buffer:
+        yield buffer
+
 # 2. Embed and store into FAISS index
-def build_vector_index(nodes, persist_path=INDEX_PATH):
-    embed_model = HuggingFaceEmbedding(model_name=EMBED_MODEL_NAME)
+def embed_nodes(nodes, embed_model):
+    """Embeds the nodes that have no embedding yet and returns the embeddings of all of them."""
+    missing = [node for node in nodes if node.embedding is None]
+    if missing:
+        embeddings = embed_model.get_text_embedding_batch(
+            [node.get_content(metadata_mode=MetadataMode.EMBED) for node in missing]
+        )
+        for node, embedding in zip(missing, embeddings):
+            node.embedding = embedding
+    return [node.embedding for node in nodes]
+
+def build_vector_index(nodes, persist_path=INDEX_PATH, embed_model=None,
+                       index_type=INDEX_TYPE, index_params=None, search_params=None, training_nodes=None):
+    if embed_model is None:
+        embed_model = HuggingFaceEmbedding(model_name=EMBED_MODEL_NAME)
 
     # Get the actual embedding dimension
     test_embedding = embed_model.get_text_embedding("test")
     embedding_dim = len(test_embedding)
     print(f"Embedding dimension from model: {embedding_dim}")
 
+    # IVF indexes are trained on a sample of the corpus (training_nodes, or the
+    # given nodes). The sampled nodes keep their embeddings so they are not
+    # encoded a second time when they are added to the index.
+    training_vectors = None
+    training_nodes = nodes if training_nodes is None else training_nodes
+    if index_type in ("ivf_flat", "ivf_pq") and training_nodes:
+        sample = random.sample(training_nodes, min(TRAIN_SAMPLE_SIZE, len(training_nodes)))
+        training_vectors = np.asarray(embed_nodes(sample, embed_model), dtype=np.float32)
+
     # Initialize FAISS index
-    faiss_index = IndexFlatL2(embedding_dim)
+    faiss_index = create_faiss_index(embedding_dim, index_type, index_params, training_vectors)
+    apply_search_params(faiss_index, **(search_params or SEARCH_PARAMS))
     vector_store = FaissVectorStore(faiss_index=faiss_index)
     storage_context = StorageContext.from_defaults(vector_store=vector_store)
-    print(f"FAISS index dimension: {faiss_index.d}")
+    print(f"FAISS index ({type(faiss_index).__name__}) dimension: {faiss_index.d}")
 
 
     # Build the vector index
@@ -42,13 +150,239 @@ def build_vector_index(nodes, persist_path=INDEX_PATH):
         os.makedirs(persist_path)
     index.storage_context.persist(persist_path)
     print("RAG index built and persisted at:", persist_path)
+    return index
+
+# 3. Incremental ingestion helpers
+def file_fingerprint(path, previous=None):
+    """
+    Returns the sha256, mtime and size of a document.
+    The file is only re-hashed when its mtime or size differ from the previous fingerprint.
+    """
+    stat = os.stat(path)
+    if previous and previous.get("mtime") == stat.st_mtime and previous.get("size") == stat.st_size:
+        return {"sha256": previous["sha256"], "mtime": stat.st_mtime, "size": stat.st_size}
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return {"sha256": digest.hexdigest(), "mtime": stat.st_mtime, "size": stat.st_size}
+
+def list_documents(docs_path=DOCS_PATH):
+    paths = []
+    for root, dirs, files in os.walk(docs_path):
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        paths.extend(os.path.join(root, name) for name in sorted(files) if not name.startswith("."))
+    return paths
+
+def load_manifest(persist_path=INDEX_PATH):
+    manifest_path = os.path.join(persist_path, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path) as f:
+        return json.load(f)
+
+def save_manifest(manifest, persist_path=INDEX_PATH):
+    manifest_path = os.path.join(persist_path, MANIFEST_FILE)
+    with open(manifest_path + ".tmp", "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(manifest_path + ".tmp", manifest_path)
+
+def diff_documents(docs_path, manifest_files):
+    """
+    Compares the documents on disk with the manifest.
+
+    Returns:
+        tuple[list[str], list[str], dict]: changed (new or edited) paths, removed paths,
+        and the current fingerprint of every document
+    """
+    fingerprints = {}
+    changed = []
+    for path in list_documents(docs_path):
+        previous = manifest_files.get(path)
+        fingerprints[path] = file_fingerprint(path, previous)
+        if previous is None or previous["sha256"] != fingerprints[path]["sha256"]:
+            changed.append(path)
+    removed = [path for path in manifest_files if path not in fingerprints]
+    return changed, removed, fingerprints
+
+def load_vector_index(persist_path=INDEX_PATH, embed_model=None):
+    vector_store = FaissVectorStore.from_persist_dir(persist_path)
+    storage_context = StorageContext.from_defaults(persist_dir=persist_path, vector_store=vector_store)
+    return load_index_from_storage(storage_context, embed_model=embed_model)
+
+def remove_nodes(index, node_ids):
+    """
+    Deletes nodes and their vectors from a FAISS-backed VectorStoreIndex.
+
+    FaissVectorStore keys vectors by their position in the FAISS index, so the
+    index is compacted and the surviving positions are renumbered.
+    """
+    node_ids = set(node_ids)
+    nodes_dict = index.index_struct.nodes_dict
+    removed_positions = sorted(int(pos) for pos, node_id in nodes_dict.items() if node_id in node_ids)
+    if not removed_positions:
+        return 0
+
+    # FaissVectorStore has no public setter for a replaced (rebuilt) FAISS index
+    index.vector_store._faiss_index = compact_index(index.vector_store.client, removed_positions)
+    index.index_struct.nodes_dict = {
+        str(int(pos) - bisect_left(removed_positions, int(pos))): node_id
+        for pos, node_id in nodes_dict.items()
+        if node_id not in node_ids
+    }
+    index.storage_context.index_store.add_index_struct(index.index_struct)
+    for node_id in node_ids:
+        index.docstore.delete_document(node_id, raise_error=False)
+    return len(removed_positions)
+
+def sweep_orphan_nodes(index, manifest):
+    """
+    Removes nodes that no manifest entry accounts for, i.e. nodes of documents
+    whose ingestion was interrupted after the last checkpoint.
+    """
+    known = {node_id for entry in manifest["files"].values() for node_id in entry.get("node_ids", [])}
+    orphans = [node_id for node_id in index.index_struct.nodes_dict.values() if node_id not in known]
+    return remove_nodes(index, orphans)
+
+# 4. Streaming, checkpointed index writer
+CHECKPOINT_EVERY_BATCHES = 20
+
+class StreamingIndexWriter:
+    """
+    Embeds node batches and appends them to the FAISS index and docstore as they arrive.
+
+    Every checkpoint_every batches the index is persisted together with the
+    manifest entries of the documents whose nodes have all been written, so an
+    interrupted ingestion resumes from the last checkpoint instead of from zero.
+    Nodes are released after each batch; only the index itself grows.
+    """
+
+    def __init__(self, index, embed_model, manifest, fingerprints, persist_path=INDEX_PATH,
+                 checkpoint_every=CHECKPOINT_EVERY_BATCHES):
+        self.index = index
+        self.embed_model = embed_model
+        self.manifest = manifest
+        self.fingerprints = fingerprints
+        self.persist_path = persist_path
+        self.checkpoint_every = checkpoint_every
+        self.failures = {}
+        self.nodes_written = 0
+        self.files_written = 0
+        self._last_node_of = {}
+        self._node_ids = {}
+        self._completed = []
+        self._batches_since_checkpoint = 0
+
+    def file_parsed(self, path, node_ids):
+        self._node_ids[path] = node_ids
+        if node_ids:
+            self._last_node_of[node_ids[-1]] = path
+        else:
+            self._completed.append(path)
+
+    def file_failed(self, path, error):
+        self.failures[path] = error
+
+    def write(self, batch):
+        embed_nodes(batch, self.embed_model)
+        self.index.insert_nodes(batch)
+        self.nodes_written += len(batch)
+        # Batches preserve parse order, so a document is complete once its last node is written
+        for node in batch:
+            path = self._last_node_of.pop(node.node_id, None)
+            if path is not None:
+                self._completed.append(path)
+        self._batches_since_checkpoint += 1
+        if self._batches_since_checkpoint >= self.checkpoint_every:
+            self.checkpoint()
+
+    def checkpoint(self):
+        self.index.storage_context.persist(self.persist_path)
+        for path in self._completed:
+            self.manifest["files"][path] = dict(self.fingerprints[path], node_ids=self._node_ids.pop(path))
+        self.files_written += len(self._completed)
+        self._completed = []
+        save_manifest(self.manifest, self.persist_path)
+        self._batches_since_checkpoint = 0
+        print(f"Checkpoint: {self.nodes_written} nodes from {self.files_written} documents written")
 
 # Entry point to create RAG vector index
-def build_rag_index():
-    nodes = load_and_split_documents()
-    build_vector_index(nodes)
+def build_rag_index(docs_path=DOCS_PATH, persist_path=INDEX_PATH, full_rebuild=False,
+                    index_type=INDEX_TYPE, index_params=None):
+    """
+    Ingests docs_path into the persisted RAG index.
+
+    A manifest of file hashes and modification times is kept next to the index.
+    Only new or changed documents are parsed and embedded, and the vectors of
+    changed or removed documents are deleted before the index is persisted in
+    place. A full rebuild happens on the first run, when the embedding model
+    or FAISS index settings change, or when full_rebuild is set.
+    """
+    embed_model = HuggingFaceEmbedding(model_name=EMBED_MODEL_NAME)
+    index_config = {"type": index_type, "params": resolve_index_params(index_type, index_params or INDEX_PARAMS)}
+    manifest = load_manifest(persist_path)
+    if (full_rebuild or manifest is None or manifest.get("embed_model") != EMBED_MODEL_NAME
+            or manifest.get("index", {"type": "flat", "params": {}}) != index_config):
+        manifest = {"embed_model": EMBED_MODEL_NAME, "index": index_config, "files": {}}
+        index = None
+    else:
+        index = load_vector_index(persist_path, embed_model=embed_model)
+
+    changed, removed, fingerprints = diff_documents(docs_path, manifest["files"])
+    print(f"Documents: {len(fingerprints)} total, {len(changed)} new or changed, {len(removed)} removed")
+
+    if index is not None:
+        # Drop nodes left behind by an interrupted run, then the stale nodes of changed or removed documents
+        orphaned = sweep_orphan_nodes(index, manifest)
+        stale_node_ids = [
+            node_id
+            for path in changed + removed
+            for node_id in manifest["files"].pop(path, {}).get("node_ids", [])
+        ]
+        deleted = remove_nodes(index, stale_node_ids)
+        print(f"Removed {deleted} stale and {orphaned} orphaned vectors")
+        if not changed and not removed and not orphaned:
+            for path, fingerprint in fingerprints.items():
+                manifest["files"][path].update(fingerprint)
+            save_manifest(manifest, persist_path)
+            print("RAG index is up to date.")
+            return
+
+    writer = StreamingIndexWriter(index, embed_model, manifest, fingerprints, persist_path)
+    batches = iter_node_batches(changed, on_parsed=writer.file_parsed, on_failed=writer.file_failed)
+
+    head_batches = []
+    if index is None:
+        # IVF index types are trained on the head of the stream before anything is written
+        if index_type in ("ivf_flat", "ivf_pq"):
+            for batch in batches:
+                head_batches.append(batch)
+                if sum(len(b) for b in head_batches) >= TRAIN_SAMPLE_SIZE:
+                    break
+        writer.index = build_vector_index([], persist_path, embed_model=embed_model, index_type=index_type,
+                                          index_params=index_config["params"],
+                                          training_nodes=[node for batch in head_batches for node in batch])
+
+    while head_batches:
+        writer.write(head_batches.pop(0))
+    for batch in batches:
+        writer.write(batch)
+    writer.checkpoint()
+
+    # Documents that failed to parse stay out of the manifest so the next run retries them
+    for path, fingerprint in fingerprints.items():
+        if path in manifest["files"]:
+            manifest["files"][path].update(fingerprint)
+    save_manifest(manifest, persist_path)
+    print("RAG index persisted at:", persist_path)
+
+    if writer.failures:
+        print(f"{len(writer.failures)} documents could not be parsed:")
+        for path, error in writer.failures.items():
+            print(f"  {path}: {error}")
 
 
 if __name__ == "__main__":
+    print_startup_report("rag_pipeline")
     build_rag_index()
     print("RAG pipeline completed successfully.")
@@ -0,0 +1,192 @@
+# retriever_service.py
+import os
+import threading
+import time
+import numpy as np
+from llama_index.core import StorageContext, load_index_from_storage
+from llama_index.embeddings.huggingface import HuggingFaceEmbedding
+from llama_index.embeddings.huggingface.utils import format_query
+from llama_index.vector_stores.faiss import FaissVectorStore
+
+from rag.rag_pipeline import INDEX_PATH, EMBED_MODEL_NAME
+from rag.index_factory import apply_search_params
+
+# Approximate (whitespace) token budget of the context attached to one prompt
+RAG_CONTEXT_TOKEN_BUDGET = 768
+
+
+def trim_to_token_budget(passages, token_budget=RAG_CONTEXT_TOKEN_BUDGET):
+    """
+    Deduplicate passages and cut them to a token budget, keeping retrieval order.
+
+    Args:
+        passages (list[str]): Retrieved passages, best first
+        token_budget (int): Maximum number of whitespace-separated tokens kept
+
+    Returns:
+        str: Passages joined by newlines
+    """
+    kept, seen, remaining = [], set(), token_budget
+    for passage in passages:
+        normalized = " ".join(passage.split())
+        if not normalized or normalized in seen:
+            continue
+        seen.add(normalized)
+        tokens = passage.split()
+        if len(tokens) > remaining:
+            if remaining > 0:
+                kept.append(" ".join(tokens[:remaining]))
+            break
+        kept.append(passage)
+        remaining -= len(tokens)
+    return "\n".join(kept)
+
+
+class RetrieverService:
+    """
+    Keeps the RAG embedding model and the persisted FAISS index loaded for the
+    lifetime of the process.
+
+    The embedding model is loaded once. The index is reloaded only when the
+    files under index_dir change on disk (e.g. after rag_pipeline.py re-ingests
+    documents). Load and query timings are kept in self.stats.
+
+    nprobe / ef_search override the search parameters persisted with IVF and
+    HNSW indexes; they have no effect on a flat index.
+    """
+
+    def __init__(self, index_dir=INDEX_PATH, embed_model_name=EMBED_MODEL_NAME, nprobe=None, ef_search=None):
+        self.index_dir = index_dir
+        self.embed_model_name = embed_model_name
+        self.nprobe = nprobe
+        self.ef_search = ef_search
+        self.embed_model = None
+        self.index = None
+        self._signature = None
+        self._lock = threading.Lock()
+        self.stats = {
+            "model_load_seconds": None,
+            "index_load_seconds": None,
+            "index_loads": 0,
+            "queries": 0,
+            "last_query_seconds": None,
+        }
+
+    def _index_signature(self):
+        """(name, size, mtime) of every persisted index file, or None if there is no index."""
+        if not os.path.isdir(self.index_dir):
+            return None
+        entries = []
+        for entry in os.scandir(self.index_dir):
+            if entry.is_file():
+                stat = entry.stat()
+                entries.append((entry.name, stat.st_size, stat.st_mtime_ns))
+        return tuple(sorted(entries)) or None
+
+    def _load_embed_model(self):
+        start = time.perf_counter()
+        # Use the same local embedding model used during RAG ingestion
+        self.embed_model = HuggingFaceEmbedding(model_name=self.embed_model_name)
+        self.stats["model_load_seconds"] = time.perf_counter() - start
+        print(f"Loaded RAG embedding model {self.embed_model_name} in {self.stats['model_load_seconds']:.2f}s")
+
+    def _load_index(self, signature):
+        start = time.perf_counter()
+        vector_store = FaissVectorStore.from_persist_dir(self.index_dir)
+        apply_search_params(vector_store.client, nprobe=self.nprobe, ef_search=self.ef_search)
+        storage_context = StorageContext.from_defaults(
+            persist_dir=self.index_dir,
+            vector_store=vector_store
+        )
+        self.index = load_index_from_storage(storage_context, embed_model=self.embed_model)
+        self._signature = signature
+        self.stats["index_load_seconds"] = time.perf_counter() - start
+        self.stats["index_loads"] += 1
+        print(f"Loaded RAG index from {self.index_dir} in {self.stats['index_load_seconds']:.2f}s")
+
+    def ensure_loaded(self):
+        """
+        Load the model and index on first use, and reload the index if it changed on disk.
+
+        Returns:
+            bool: True if an index is available
+        """
+        with self._lock:
+            signature = self._index_signature()
+            if signature is None:
+                self.index, self._signature = None, None
+                return False
+            if self.embed_model is None:
+                self._load_embed_model()
+            if signature != self._signature:
+                self._load_index(signature)
+            return True
+
+    def retrieve(self, query, top_k=3):
+        """
+        Retrieve the top_k nodes for a query.
+
+        Returns:
+            list: Retrieved nodes, empty if no index has been built yet
+        """
+        if not self.ensure_loaded():
+            print("RAG index not found, Please run rag_pipeline.py to ingest documents.")
+            return []
+        start = time.perf_counter()
+        retrieved_nodes = self.index.as_retriever(similarity_top_k=top_k).retrieve(query)
+        self.stats["last_query_seconds"] = time.perf_counter() - start
+        self.stats["queries"] += 1
+        return retrieved_nodes
+
+    def get_context(self, query, top_k=3):
+        return "\n".join([n.text for n in self.retrieve(query, top_k=top_k)])
+
+    def get_contexts(self, queries, top_k=3, token_budget=RAG_CONTEXT_TOKEN_BUDGET):
+        """
+        Retrieve a separate context for every query.
+
+        All queries are embedded in one batch and searched with one FAISS call.
+        Each context is deduplicated and cut to token_budget.
+
+        Returns:
+            list[str]: One context per query, empty strings if no index has been built yet
+        """
+        if not queries:
+            return []
+        if not self.ensure_loaded():
+            print("RAG index not found, Please run rag_pipeline.py to ingest documents.")
+            return ["" for _ in queries]
+
+        index, embed_model = self.index, self.embed_model
+        start = time.perf_counter()
+        query_texts = [format_query(q, embed_model.model_name, embed_model.query_instruction) for q in queries]
+        query_embeddings = np.asarray(embed_model.get_text_embedding_batch(query_texts), dtype=np.float32)
+        _, faiss_ids = index.vector_store.client.search(query_embeddings, top_k)
+
+        nodes_dict = index.index_struct.nodes_dict
+        docstore = index.docstore
+        contexts = []
+        for row in faiss_ids:
+            passages = []
+            for faiss_id in row:
+                node_id = nodes_dict.get(str(faiss_id)) if faiss_id >= 0 else None
+                if node_id is not None:
+                    passages.append(docstore.get_node(node_id).get_content())
+            contexts.append(trim_to_token_budget(passages, token_budget))
+
+        self.stats["last_query_seconds"] = time.perf_counter() - start
+        self.stats["queries"] += len(queries)
+        return contexts
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_retriever_service():
+    """Process-wide retriever service, shared across planner runs and Streamlit reruns."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = RetrieverService()
+        return _service
@@ -3,9 +3,13 @@
 import streamlit as st
 import streamlit.components.v1 as components
 import json
-from agents.orchestrator_agent import orchestrate_planner, orchestrate_executor, orchestrate_reporter
+import time
+from ui import services
+from utils.model_registry import print_startup_report
+from ui.jobs import DONE, CANCELLED
 from agents.citation_agent import evaluate_response
-from utils.file_utils import get_data_path
+
+print_startup_report("app_chat", once=True)
 
 # Function to auto-focus the textarea input
 def auto_focus_textarea():
@@ -24,6 +28,43 @@ def auto_focus_textarea():
         height=0,
     )
 
+# === Background Jobs ===
+JOB_POLL_SECONDS = 1.0
+
+def start_job(name, fn, *args, **kwargs):
+    """
+    Returns the session's running job, submitting fn as a new background job if there is none.
+    The script only polls the job, so the page stays responsive while agents run.
+    """
+    runner = services.get_job_runner()
+    job = runner.get(st.session_state.job_id) if st.session_state.get("job_id") else None
+    if job is None:
+        job = runner.submit(name, fn, *args, **kwargs)
+        st.session_state.job_id = job.id
+    return job
+
+def show_job_progress(job):
+    snapshot = job.snapshot()
+    done, total = snapshot["done"], snapshot["total"]
+    label = f"{snapshot['name']}: {done}/{total}" if total else f"{snapshot['name']}: starting..."
+    st.progress(done / total if total else 0.0, text=label)
+    for partial in snapshot["partial_results"][-3:]:
+        st.json(partial, expanded=False)
+    if st.button("Cancel", key=f"cancel_{job.id}"):
+        job.cancel()
+
+def finish_job(job, retry_stage):
+    """Returns the finished job's result, or None after reporting a cancelled or failed job."""
+    st.session_state.job_id = None
+    if job.status == DONE:
+        return job.result
+    if job.status == CANCELLED:
+        st.session_state.messages.append(("assistant", f"⏹️ {job.name} cancelled."))
+    else:
+        st.session_state.messages.append(("assistant", f"❌ {job.name} failed: {job.error}"))
+    st.session_state.stage = retry_stage
+    return None
+
 st.set_page_config(page_title="Agentic AI Validation System", layout="centered")
 st.title("🤖 Agentic AI Validation System")
 
@@ -31,6 +72,9 @@ if "stage" not in st.session_state:
     st.session_state.stage = "init"
     st.session_state.file_uploaded = False
     st.session_state.use_llm = False
+    st.session_state.requirements = None
+    st.session_state.request_key = None
+    st.session_state.job_id = None
     st.session_state.planner_output = None
     st.session_state.execution_df = None
     st.session_state.report_summary = None
@@ -56,13 +100,12 @@ if st.session_state.stage == "init":
 elif st.session_state.stage == "awaiting_upload":
     uploaded_file = st.file_uploader("Upload the requirements json file", type=["json"])
     if uploaded_file and not st.session_state.file_uploaded:
-        with open(get_data_path("requirements.json"), "wb") as f:
-            f.write(uploaded_file.read())
+        # Kept per session instead of overwriting data/requirements.json, which all sessions share
+        requirements_data = json.load(uploaded_file)
+        st.session_state.requirements = requirements_data
         st.session_state.file_uploaded = True
 
         #Display uploaded requirements
-        with open(get_data_path("requirements.json")) as f:
-            requirements_data = json.load(f)
         st.session_state.messages.append(("assistant", "✅ Requirements file uploaded successfully!"))
         st.session_state.messages.append(("assistant", "Here are the requirements:"))
         st.session_state.messages.append(("assistant", {"type": "json", "data": requirements_data}))
@@ -105,36 +148,32 @@ elif st.session_state.stage == "awaiting_for_planner_option":
         st.rerun()
 
 elif st.session_state.stage == "run_planner":
-        planner_output = orchestrate_planner(get_data_path("sample_validation_plan.json"), use_llm=st.session_state.use_llm)
-        st.session_state.planner_output = planner_output
+    job = start_job("Planner Agent", services.plan, st.session_state.requirements, use_llm=st.session_state.use_llm)
+    if not job.finished:
+        show_job_progress(job)
+        time.sleep(JOB_POLL_SECONDS)
+        st.rerun()
+    result = finish_job(job, retry_stage="ask_to_plan")
+    if result is None:
+        st.rerun()
+    request_key, planner_output = result
+    st.session_state.request_key = request_key
+    st.session_state.planner_output = planner_output
+    st.session_state.messages.append(
+        ("assistant",
+         f"🧠 Planner Agent selected {len(st.session_state.planner_output['test_catalog'])} test cases."))
+    st.session_state.messages.append(("assistant", {"type": "json", "data": st.session_state.planner_output}))
+
+    # Include citation/judgement log if LLM is used
+    if st.session_state.use_llm and "citations" in st.session_state.planner_output:
         st.session_state.messages.append(
-            ("assistant",
-             f"🧠 Planner Agent selected {len(st.session_state.planner_output['test_catalog'])} test cases."))
-        st.session_state.messages.append(("assistant", {"type": "json", "data": st.session_state.planner_output}))
-
-        # Include citation/judgement log if LLM is used
-        if st.session_state.use_llm and "citations" in st.session_state.planner_output:
-            st.session_state.messages.append(
-                ("assistant", "🔍 Citation Judgement Results:"))
-            st.session_state.messages.append(
-                ("assistant", {"type": "json", "data": st.session_state.planner_output["citations"]}))
-
-        """
-            # Use Citation Agent to evaluate planner output
-            citation_results = []
-            for req in st.session_state.planner_output["requirements"]:
-                req_text = req["requirement_text"]
-                context_text = req.get("context", "")
-                llm_response = req.get("llm_response", "")
-                evaluation = orchestrate_reporter.evaluate_response(req_text, context_text, llm_response)
-                citation_results.append(evaluation)
-            st.session_state.planner_output["citations"] = citation_results
-            st.session_state.messages.append(("assistant", {"type": "json", "data": citation_results}))
-        """
+            ("assistant", "🔍 Citation Judgement Results:"))
+        st.session_state.messages.append(
+            ("assistant", {"type": "json", "data": st.session_state.planner_output["citations"]}))
 
-        st.session_state.messages.append(("assistant", "Would you like me to execute them? (yes/no)"))
-        st.session_state.stage = "ask_to_execute"
-        st.rerun()
+    st.session_state.messages.append(("assistant", "Would you like me to execute them? (yes/no)"))
+    st.session_state.stage = "ask_to_execute"
+    st.rerun()
 
 elif st.session_state.stage == "ask_to_execute":
     user_input = st.chat_input("Execute now? yes or no", key="ask_to_execute_input")
@@ -149,7 +188,14 @@ elif st.session_state.stage == "ask_to_execute":
         st.rerun()
 
 elif st.session_state.stage == "run_executor":
-    execution_df = orchestrate_executor(get_data_path("sample_validation_plan.json"))
+    job = start_job("Executor Agent", services.execute, st.session_state.request_key, st.session_state.planner_output)
+    if not job.finished:
+        show_job_progress(job)
+        time.sleep(JOB_POLL_SECONDS)
+        st.rerun()
+    execution_df = finish_job(job, retry_stage="ask_to_execute")
+    if execution_df is None:
+        st.rerun()
     st.session_state.execution_df = execution_df
     st.session_state.messages.append(("assistant", f"⚙️ Executor Agent completed execution on {len(st.session_state.execution_df)} tests."))
     st.session_state.messages.append(("assistant", {"type": "dataframe", "data": execution_df}))
@@ -164,25 +210,38 @@ elif st.session_state.stage == "ask_to_report":
         st.session_state.messages.append(("user", user_input))
         if "yes" in user_input.lower():
             st.session_state.messages.append(("assistant", "📊 Reporter Agent is generating report..."))
-            report_summary = orchestrate_reporter(st.session_state.execution_df)
-            st.session_state.report_summary = report_summary
-            st.session_state.messages.append(("assistant", "📋 Summary Report"))
-            st.session_state.messages.append(("assistant", {"type": "json", "data": report_summary[0]}))
-            st.session_state.messages.append(("assistant", "📂 Domain Breakdown"))
-            st.session_state.messages.append(("assistant", {"type": "dataframe", "data": report_summary[1]}))
-            st.session_state.messages.append(
-                ("assistant", "✅ All done! Would you like to start over with a new requirement file? (yes/no)"))
-            st.session_state.stage = "done"
+            st.session_state.stage = "run_reporter"
         else:
             st.session_state.messages.append(("assistant", "Alright, I'm here if you need me!"))
         st.rerun()
 
+elif st.session_state.stage == "run_reporter":
+    job = start_job("Reporter Agent", services.report, st.session_state.request_key, st.session_state.execution_df)
+    if not job.finished:
+        show_job_progress(job)
+        time.sleep(JOB_POLL_SECONDS)
+        st.rerun()
+    report_summary = finish_job(job, retry_stage="ask_to_report")
+    if report_summary is None:
+        st.rerun()
+    st.session_state.report_summary = report_summary
+    st.session_state.messages.append(("assistant", "📋 Summary Report"))
+    st.session_state.messages.append(("assistant", {"type": "json", "data": report_summary[0]}))
+    st.session_state.messages.append(("assistant", "📂 Domain Breakdown"))
+    st.session_state.messages.append(("assistant", {"type": "dataframe", "data": report_summary[1]}))
+    st.session_state.messages.append(
+        ("assistant", "✅ All done! Would you like to start over with a new requirement file? (yes/no)"))
+    st.session_state.stage = "done"
+    st.rerun()
+
 elif st.session_state.stage == "done":
     user_input = st.chat_input("Start over? yes or no", key="restart_input")
     auto_focus_textarea()
     if user_input:
         st.session_state.messages.append(("user", user_input))
         if "yes" in user_input.lower():
+            if st.session_state.get("job_id"):
+                services.get_job_runner().cancel(st.session_state.job_id)
             st.session_state.clear()
             st.rerun()
         else:
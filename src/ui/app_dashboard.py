@@ -1,8 +1,10 @@
 # app_dashboard.py
 import streamlit as st
 import json
-from agents.orchestrator_agent import orchestrate
-from utils.file_utils import get_data_path
+from ui import services
+from utils.model_registry import print_startup_report
+
+print_startup_report("app_dashboard", once=True)
 
 st.set_page_config(page_title="Agentic AI Validation System", layout="wide")
 st.title("🤖 Agentic AI Validation System")
@@ -21,11 +23,11 @@ uploaded_requirements = st.file_uploader("📂 Upload Requirement JSON", type=["
 planner_method = st.radio("🧠 Select Planner Strategy", ["Rule-based applicability", "LLM-based applicability"])
 use_llm = planner_method == "LLM-based applicability"
 
+uploaded_content = None
 if uploaded_requirements:
     st.markdown("### 📄 Uploaded Requirements Preview")
     uploaded_content = json.load(uploaded_requirements)
     st.json(uploaded_content)
-    uploaded_requirements.seek(0)  # Reset pointer for reuse in orchestration
 
 #Semantic Query
 query = st.text_input("🔍 Enter Semantic Query (optional)", placeholder="e.g., power test failures")
@@ -36,15 +38,14 @@ if "orchestrator_ran" not in st.session_state:
 
 #Run Orchestration Button
 if st.button("🚀 Run Orchestration"):
-    if uploaded_requirements:
-        with open(get_data_path("requirements.json"), "wb") as f:
-            f.write(uploaded_requirements.read())
-            uploaded_requirements.seek(0)  # Reset pointer for reuse in orchestration
+    # Uploaded requirements stay in memory; identical requests from any session share one cached run
+    requirements = uploaded_content if uploaded_content is not None else services.load_requirements()
     try:
-        planner_output, execution_df, report_summary = orchestrate(get_data_path("requirements.json"), use_llm=use_llm, query=query)
+        planner_output, execution_df, report_summary = services.orchestrate(requirements, use_llm=use_llm)
         st.session_state['planner_output'] = planner_output
         st.session_state['execution_df'] = execution_df
         st.session_state['report_summary'] = report_summary
+        st.session_state['semantic_results'] = services.search(query) if query else []
         st.session_state['orchestrator_ran'] = True
         st.success("✅ Orchestration completed!")
     except Exception as e:
@@ -79,6 +80,9 @@ with st.expander("📊 Reporter Agent Output"):
         st.image(
             f"data:image/png;base64,{st.session_state['report_summary'][3]}",
             caption="Validation Summary Chart")
+        if st.session_state.get('semantic_results'):
+            st.markdown("### 🔍 Semantic Search Results")
+            st.json(st.session_state['semantic_results'])
         st.markdown("Reporter Agent analyzed results and generated key insights.")
     else:
         st.info("Run Orchestrator to see Reporter output.")
@@ -0,0 +1,138 @@
+# jobs.py
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+JOB_WORKERS = 8
+# Finished jobs are forgotten after this long
+JOB_RETENTION_SECONDS = 3600
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+
+
+class JobCancelled(Exception):
+    """Raised from a job's progress callback once the job has been cancelled."""
+
+
+class Job:
+    """
+    A background orchestration step.
+
+    The work function receives job.progress as its progress callback. Each call
+    records how far the job is and any partial result, and raises JobCancelled
+    once cancel() has been requested, which unwinds the work at its next step.
+    """
+
+    def __init__(self, name):
+        self.id = uuid.uuid4().hex[:12]
+        self.name = name
+        self.status = QUEUED
+        self.done = 0
+        self.total = None
+        self.partial_results = []
+        self.result = None
+        self.error = None
+        self.finished_at = None
+        self.future = None
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    @property
+    def finished(self):
+        return self.status in (DONE, FAILED, CANCELLED)
+
+    def cancel(self):
+        self._cancel.set()
+        if self.future is not None and self.future.cancel():
+            self._finish(CANCELLED)
+
+    def progress(self, done, total, partial=None):
+        if self.cancelled:
+            raise JobCancelled(self.id)
+        with self._lock:
+            self.done = done
+            self.total = total
+            if partial is not None:
+                self.partial_results.append(partial)
+
+    def snapshot(self):
+        """Consistent view of the job for rendering: status, done, total, partial_results, error."""
+        with self._lock:
+            return {
+                "id": self.id,
+                "name": self.name,
+                "status": self.status,
+                "done": self.done,
+                "total": self.total,
+                "partial_results": list(self.partial_results),
+                "error": self.error,
+            }
+
+    def _finish(self, status, result=None, error=None):
+        with self._lock:
+            self.status = status
+            self.result = result
+            self.error = error
+            self.finished_at = time.time()
+
+
+class JobRunner:
+    """
+    Runs jobs on a shared thread pool so UI scripts never block on agent work.
+    Sessions keep only the job id and poll the job for progress.
+    """
+
+    def __init__(self, max_workers=JOB_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, name, fn, *args, **kwargs):
+        """
+        Starts fn(*args, progress=job.progress, **kwargs) in the background.
+
+        Returns:
+            Job: The queued job; look it up later with get(job.id)
+        """
+        self._prune()
+        job = Job(name)
+        with self._lock:
+            self._jobs[job.id] = job
+        job.future = self._executor.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def _run(self, job, fn, args, kwargs):
+        if job.cancelled:
+            job._finish(CANCELLED)
+            return
+        job.status = RUNNING
+        try:
+            result = fn(*args, progress=job.progress, **kwargs)
+        except JobCancelled:
+            job._finish(CANCELLED)
+        except Exception as e:
+            print(f"X Job {job.name} ({job.id}) failed: {type(e).__name__}: {e}")
+            job._finish(FAILED, error=f"{type(e).__name__}: {e}")
+        else:
+            job._finish(CANCELLED if job.cancelled else DONE, result=result)
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job is not None:
+            job.cancel()
+        return job
+
+    def _prune(self):
+        cutoff = time.time() - JOB_RETENTION_SECONDS
+        with self._lock:
+            for job_id in [job_id for job_id, job in self._jobs.items() if job.finished_at and job.finished_at < cutoff]:
+                del self._jobs[job_id]
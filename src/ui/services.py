@@ -0,0 +1,192 @@
+# services.py
+import copy
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import pandas as pd
+import streamlit as st
+
+from agents.planner_agent import run_planner_agent, get_applicability_index, get_catalog_store
+from agents.executor_agent import run_executor_agent
+from agents.reporter_agent import run_reporter_agent, semantic_search
+from utils.catalog import load_catalog, load_json_cached
+from utils.file_utils import get_data_path
+from utils.results_store import get_results_store
+from ui.jobs import JobRunner, JobCancelled
+
+PLAN_TEMPLATE = "sample_validation_plan.json"
+RESULT_CACHE_ENTRIES = 64
+
+# Plan fields written by the planner; they are left out of the request key
+PLANNER_OUTPUT_FIELDS = ("test_catalog", "coverage", "citations")
+
+
+class SingleFlight:
+    """
+    Runs at most one computation per key at a time. Callers arriving while
+    a computation for their key is in flight wait for it and share its result.
+    If the computation was cancelled by its own caller's job, waiting callers
+    run it again themselves rather than inheriting the cancellation.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight = {}
+
+    def run(self, key, compute):
+        while True:
+            with self._lock:
+                future = self._in_flight.get(key)
+                owner = future is None
+                if owner:
+                    future = Future()
+                    self._in_flight[key] = future
+            if owner:
+                break
+            try:
+                return future.result()
+            except JobCancelled:
+                continue
+        try:
+            result = compute()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+
+# === Process-wide state ===
+# plan, execute and report run on JobRunner threads, which have no Streamlit script
+# context, so everything they touch is cached at module level instead of with st.cache_*.
+_single_flight = SingleFlight()
+_stage_results = OrderedDict()
+_stage_results_lock = threading.Lock()
+
+
+def get_single_flight():
+    return _single_flight
+
+
+@st.cache_resource
+def get_job_runner():
+    """Background job runner shared by every session (see ui/jobs.py)."""
+    return JobRunner()
+
+
+def load_shared_models(use_llm=False):
+    """
+    Loads the catalog and its indexes once per server process, shared by every session.
+    LLM mode also syncs the catalog embedding store, which loads the shared embedder.
+    Later calls are cheap: the index and store are only rebuilt for a new catalog version.
+    """
+    catalog = load_catalog()
+    get_applicability_index(catalog.records)
+    if use_llm:
+        get_catalog_store(catalog.records, catalog_version=catalog.version)
+    return catalog.version
+
+
+def orchestration_key(requirements, use_llm, catalog_version, plan_template):
+    """Hash of everything a planning result depends on: requirements, planner strategy, catalog and plan."""
+    template = {key: value for key, value in plan_template.items() if key not in PLANNER_OUTPUT_FIELDS}
+    payload = json.dumps({
+        "requirements": requirements,
+        "strategy": "llm" if use_llm else "rules",
+        "catalog_version": catalog_version,
+        "plan": template,
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _cached_stage(stage, key, compute):
+    """
+    Result of compute for stage and key, from a process-wide LRU of RESULT_CACHE_ENTRIES.
+    Callers get a copy, so mutating a result never changes the cached one.
+    """
+    cache_key = f"{stage}:{key}"
+    with _stage_results_lock:
+        if cache_key in _stage_results:
+            _stage_results.move_to_end(cache_key)
+            return copy.deepcopy(_stage_results[cache_key])
+    result = get_single_flight().run(cache_key, compute)
+    with _stage_results_lock:
+        _stage_results[cache_key] = result
+        _stage_results.move_to_end(cache_key)
+        while len(_stage_results) > RESULT_CACHE_ENTRIES:
+            _stage_results.popitem(last=False)
+    return copy.deepcopy(result)
+
+
+def load_requirements():
+    return load_json_cached(get_data_path("requirements.json"))
+
+
+def plan(requirements, use_llm=False, plan_path=None, progress=None):
+    """
+    Plans the requirements, reusing the result of any identical earlier request.
+    progress is passed to the planner (per-requirement updates) when it actually runs.
+
+    Returns:
+        tuple[str, dict]: Request key (for execute/report) and the planner output
+    """
+    plan_path = plan_path or get_data_path(PLAN_TEMPLATE)
+    load_shared_models(use_llm)
+    key = orchestration_key(requirements, use_llm, load_catalog().version, load_json_cached(plan_path))
+    planner_output = _cached_stage(
+        "plan", key,
+        lambda: run_planner_agent(
+            plan_path, use_llm=use_llm, requirements=requirements, write_plan=False, progress=progress
+        )
+    )
+    return key, planner_output
+
+
+def execute(key, planner_output, progress=None):
+    """
+    Runs the plan on the SUTs. Identical requests in flight at the same time share one run,
+    but results are never cached: every later request executes on the hardware again.
+    """
+    return get_single_flight().run(
+        f"execute:{key}",
+        lambda: run_executor_agent(planner_output, results_store=get_results_store(), progress=progress)
+    )
+
+
+def results_key(key, execution_df):
+    """Request key extended with a hash of the executor results, so a report is only reused for the same results."""
+    digest = hashlib.sha256(pd.util.hash_pandas_object(execution_df, index=False).values.tobytes()).hexdigest()
+    return f"{key}:{digest}"
+
+
+def report(key, execution_df, chart_format=None, progress=None):
+    """Reporter output (summary, domain breakdown, results, chart) for the request key and its results."""
+    result = _cached_stage(
+        f"report:{chart_format}", results_key(key, execution_df),
+        lambda: run_reporter_agent(execution_df, chart_format=chart_format)
+    )
+    if progress:
+        progress(1, 1)
+    return result
+
+
+def orchestrate(requirements, use_llm=False, chart_format="png"):
+    """
+    Planner -> Executor -> Reporter run; planning and reporting are cached, execution always runs.
+
+    Returns: (planner_output, execution_df, (summary, domain_df, full_df, chart))
+    """
+    key, planner_output = plan(requirements, use_llm=use_llm)
+    execution_df = execute(key, planner_output)
+    return planner_output, execution_df, report(key, execution_df, chart_format=chart_format)
+
+
+def search(query, k=3):
+    return semantic_search(query, k)
@@ -0,0 +1,94 @@
+# applicability_index.py
+from collections.abc import Mapping
+import numpy as np
+
+
+EMPTY_POSTINGS = np.empty(0, dtype=np.int64)
+
+
+def merge_postings(postings):
+    """Sorted, de-duplicated union of posting lists (sorted int arrays)."""
+    postings = [p for p in postings if len(p)]
+    if not postings:
+        return EMPTY_POSTINGS
+    if len(postings) == 1:
+        return postings[0]
+    return np.unique(np.concatenate(postings))
+
+
+class ApplicabilityIndex:
+    """
+    Inverted index from applicability tag to the test cases carrying it.
+
+    Test cases are numbered by their catalog position and every tag maps to a
+    sorted posting list of those numbers, so matching a requirement merges a few
+    posting lists instead of intersecting sets per test case. The cost follows the
+    number of matching tests, not the catalog size.
+    """
+
+    def __init__(self, test_cases):
+        self.source = test_cases
+        self.test_cases = [tc for tc in test_cases if isinstance(tc, Mapping)]
+        positions_by_tag = {}
+        for position, tc in enumerate(self.test_cases):
+            for tag in set(tc.get("applicability") or []):
+                positions_by_tag.setdefault(tag, []).append(position)
+        # Positions are appended in catalog order, so every posting list is already sorted
+        self.postings = {tag: np.array(positions, dtype=np.int64) for tag, positions in positions_by_tag.items()}
+
+    def positions_for(self, tags):
+        """Sorted catalog positions of the test cases carrying any of tags."""
+        return merge_postings([self.postings.get(tag, EMPTY_POSTINGS) for tag in set(tags or [])])
+
+    def match(self, requirements):
+        """
+        Matches every requirement against the catalog.
+
+        Args:
+            requirements (list[dict]): Requirements with an "applicability" tag list
+
+        Returns:
+            tuple[list[int], list[list[int]]]: Catalog positions of all matched tests
+            (in catalog order), and the matched positions per requirement
+        """
+        per_requirement = []
+        tags = set()
+        for req in requirements:
+            req_tags = req.get("applicability", [])
+            per_requirement.append(self.positions_for(req_tags).tolist())
+            tags.update(req_tags or [])
+        return self.positions_for(tags).tolist(), per_requirement
+
+    def coverage(self, requirements, per_requirement=None):
+        """
+        Requirement-to-test coverage.
+
+        Args:
+            requirements (list[dict]): Requirements with an "applicability" tag list
+            per_requirement (list[list[int]] | None): Result of match() if already computed
+
+        Returns:
+            dict: requirement id -> ids of the test cases covering it
+        """
+        if per_requirement is None:
+            _, per_requirement = self.match(requirements)
+        return {
+            str(req.get("id", i)): [self.test_cases[p]["id"] for p in positions]
+            for i, (req, positions) in enumerate(zip(requirements, per_requirement))
+        }
+
+    def coverage_matrix(self, requirements):
+        """
+        Requirement-to-test coverage as a boolean matrix.
+
+        Returns:
+            tuple[list[str], list[str], np.ndarray]: requirement ids (rows), ids of the
+            matched tests (columns), and a bool matrix marking which tests cover which requirement
+        """
+        selected, per_requirement = self.match(requirements)
+        column_of = {position: column for column, position in enumerate(selected)}
+        matrix = np.zeros((len(requirements), len(selected)), dtype=bool)
+        for row, positions in enumerate(per_requirement):
+            matrix[row, [column_of[p] for p in positions]] = True
+        req_ids = [str(req.get("id", i)) for i, req in enumerate(requirements)]
+        return req_ids, [self.test_cases[p]["id"] for p in selected], matrix
@@ -0,0 +1,33 @@
+# async_utils.py
+import asyncio
+
+# Defaults for concurrent LLM calls (Ollama serves a handful of requests in parallel)
+LLM_MAX_CONCURRENCY = 4
+LLM_TIMEOUT_SECONDS = 120
+
+
+async def gather_bounded(call_factories, max_concurrency=LLM_MAX_CONCURRENCY, timeout=LLM_TIMEOUT_SECONDS):
+    """
+    Run coroutines with a bounded number in flight and a per-call timeout.
+
+    Args:
+        call_factories (list[callable]): Zero-argument callables returning a coroutine
+        max_concurrency (int): Maximum number of calls awaited at the same time
+        timeout (float | None): Seconds allowed per call, None for no limit
+
+    Returns:
+        list: Results in the same order as call_factories. A call that failed or
+        timed out yields its exception instead of a result.
+    """
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def run(make_call):
+        async with semaphore:
+            return await asyncio.wait_for(make_call(), timeout)
+
+    return await asyncio.gather(*(run(make_call) for make_call in call_factories), return_exceptions=True)
+
+
+def run_async(coro):
+    """Run a coroutine to completion from synchronous code."""
+    return asyncio.run(coro)
@@ -0,0 +1,247 @@
+# catalog.py
+import hashlib
+import json
+import os
+import threading
+from collections.abc import Mapping
+
+from utils.file_utils import get_data_path
+
+try:
+    import pyarrow as pa
+except ImportError:  # Optional: without pyarrow the baseline is parsed from JSON on every load
+    pa = None
+
+CATALOG_CACHE_DIR = "catalog_index"
+
+TEST_CASE_FIELDS = (
+    "id", "title", "domain", "validation_category", "validation_type", "owner", "description", "applicability"
+)
+
+
+class TestCase(Mapping):
+    """
+    Slot-based, read-only test case record.
+
+    Behaves like the dicts it replaces (tc["id"], tc.get("applicability")),
+    including any extra columns the baseline export carries.
+    """
+    __slots__ = TEST_CASE_FIELDS + ("extra",)
+
+    def __init__(self, id, title=None, domain=None, validation_category=None, validation_type=None,
+                 owner=None, description=None, applicability=(), extra=None):
+        self.id = id
+        self.title = title
+        self.domain = domain
+        self.validation_category = validation_category
+        self.validation_type = validation_type
+        self.owner = owner
+        self.description = description
+        self.applicability = tuple(applicability or ())
+        self.extra = extra or {}
+
+    def __getitem__(self, key):
+        if key in TEST_CASE_FIELDS:
+            value = getattr(self, key)
+            return list(value) if key == "applicability" else value
+        return self.extra[key]
+
+    def __iter__(self):
+        yield from TEST_CASE_FIELDS
+        yield from self.extra
+
+    def __len__(self):
+        return len(TEST_CASE_FIELDS) + len(self.extra)
+
+    def __repr__(self):
+        return f"TestCase(id={self.id!r}, title={self.title!r})"
+
+    def to_dict(self):
+        return dict(self)
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _records_from_json(rows):
+    records = []
+    for row in rows:
+        if not isinstance(row, dict) or row.get("id") is None:
+            continue
+        extra = {key: value for key, value in row.items() if key not in TEST_CASE_FIELDS}
+        records.append(TestCase(
+            id=str(row["id"]),
+            title=row.get("title"),
+            domain=row.get("domain"),
+            validation_category=row.get("validation_category"),
+            validation_type=row.get("validation_type"),
+            owner=row.get("owner"),
+            description=row.get("description"),
+            applicability=row.get("applicability") or (),
+            extra=extra,
+        ))
+    return records
+
+
+def _records_to_table(records):
+    def as_strings(values):
+        return [None if value is None else str(value) for value in values]
+
+    columns = {
+        field: as_strings(getattr(tc, field) for tc in records)
+        for field in TEST_CASE_FIELDS if field != "applicability"
+    }
+    columns["applicability"] = [list(tc.applicability) for tc in records]
+    columns["extra"] = [json.dumps(tc.extra) if tc.extra else None for tc in records]
+    schema = pa.schema(
+        [(field, pa.string()) for field in TEST_CASE_FIELDS if field != "applicability"]
+        + [("applicability", pa.list_(pa.string())), ("extra", pa.string())]
+    )
+    return pa.table({field: columns[field] for field in schema.names}, schema=schema)
+
+
+def _records_from_table(table):
+    columns = {name: table.column(name).to_pylist() for name in table.column_names}
+    extras = columns.pop("extra")
+    return [
+        TestCase(*values, extra=json.loads(extra) if extra else None)
+        for values, extra in zip(zip(*(columns[field] for field in TEST_CASE_FIELDS)), extras)
+    ]
+
+
+class Catalog:
+    """
+    A loaded test case baseline.
+
+    Attributes:
+        source_path (str): JSON baseline the catalog was built from
+        version (str): sha256 of the source file, changes whenever the baseline does
+        table (pyarrow.Table | None): Memory-mapped columnar view (None without pyarrow)
+    """
+
+    def __init__(self, source_path, version, table=None, records=None):
+        self.source_path = source_path
+        self.version = version
+        self.table = table
+        self._records = records
+        self._by_id = None
+
+    @property
+    def records(self):
+        """Typed TestCase records, materialized from the columnar table on first access."""
+        if self._records is None:
+            self._records = _records_from_table(self.table)
+        return self._records
+
+    @property
+    def by_id(self):
+        if self._by_id is None:
+            self._by_id = {tc.id: tc for tc in self.records}
+        return self._by_id
+
+    def __len__(self):
+        return self.table.num_rows if self.table is not None else len(self.records)
+
+    def __iter__(self):
+        return iter(self.records)
+
+
+def _cache_paths(source_path, cache_dir):
+    name = os.path.splitext(os.path.basename(source_path))[0]
+    return os.path.join(cache_dir, f"{name}.arrow"), os.path.join(cache_dir, f"{name}.meta.json")
+
+
+def _load_uncached(source_path, cache_dir, stat):
+    arrow_path, meta_path = _cache_paths(source_path, cache_dir)
+    meta = None
+    if os.path.exists(meta_path) and os.path.exists(arrow_path):
+        with open(meta_path) as f:
+            meta = json.load(f)
+
+    # Re-hash only when mtime or size moved; re-convert only when the hash changed
+    if meta and meta.get("mtime") == stat.st_mtime and meta.get("size") == stat.st_size:
+        version = meta["sha256"]
+    else:
+        version = _file_sha256(source_path)
+
+    if pa is None:
+        with open(source_path) as f:
+            return Catalog(source_path, version, records=_records_from_json(json.load(f)))
+
+    records = None
+    if meta is None or meta.get("sha256") != version:
+        print(f"Converting {source_path} to columnar cache {arrow_path}")
+        with open(source_path) as f:
+            records = _records_from_json(json.load(f))
+        os.makedirs(cache_dir, exist_ok=True)
+        table = _records_to_table(records)
+        # Per-process temp files so concurrent processes (batch runner) never clobber each other
+        arrow_tmp = f"{arrow_path}.{os.getpid()}.tmp"
+        with pa.OSFile(arrow_tmp, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(arrow_tmp, arrow_path)
+
+    meta_tmp = f"{meta_path}.{os.getpid()}.tmp"
+    with open(meta_tmp, "w") as f:
+        json.dump({"sha256": version, "mtime": stat.st_mtime, "size": stat.st_size}, f)
+    os.replace(meta_tmp, meta_path)
+
+    table = pa.ipc.open_file(pa.memory_map(arrow_path, "r")).read_all()
+    return Catalog(source_path, version, table=table, records=records)
+
+
+_loaded = {}
+_json_cache = {}
+_loaded_lock = threading.Lock()
+
+
+def load_catalog(source_path=None, cache_dir=CATALOG_CACHE_DIR):
+    """
+    Loads the test case baseline through a columnar cache.
+
+    The JSON baseline is converted once to an Arrow IPC file in cache_dir and
+    memory-mapped on later loads. It is re-converted only when the source
+    file's hash changes. Within a process, the loaded catalog is reused until
+    the source file changes on disk.
+
+    Args:
+        source_path (str | None): JSON baseline, defaults to data/tcd_baseline.json
+        cache_dir (str): Directory holding the Arrow cache
+
+    Returns:
+        Catalog: The loaded catalog
+    """
+    source_path = source_path or get_data_path("tcd_baseline.json")
+    stat = os.stat(source_path)
+    signature = (stat.st_mtime, stat.st_size)
+    with _loaded_lock:
+        cached = _loaded.get(source_path)
+        if cached and cached[0] == signature:
+            return cached[1]
+        catalog = _load_uncached(source_path, cache_dir, stat)
+        _loaded[source_path] = (signature, catalog)
+        return catalog
+
+
+def load_json_cached(path):
+    """
+    json.load with an in-process cache keyed by the file's mtime and size.
+    Callers must treat the returned object as read-only.
+    """
+    stat = os.stat(path)
+    signature = (stat.st_mtime, stat.st_size)
+    with _loaded_lock:
+        cached = _json_cache.get(path)
+        if cached and cached[0] == signature:
+            return cached[1]
+    with open(path) as f:
+        data = json.load(f)
+    with _loaded_lock:
+        _json_cache[path] = (signature, data)
+    return data
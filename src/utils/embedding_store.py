@@ -0,0 +1,185 @@
+# embedding_store.py
+import hashlib
+import json
+import os
+import threading
+import numpy as np
+
+CATALOG_INDEX_DIR = "catalog_index"
+
+MATRIX_FILE = "embeddings.f32"
+MANIFEST_FILE = "manifest.json"
+
+
+def content_hash(text):
+    """
+    Stable hash of the text an embedding was computed from.
+
+    Args:
+        text (str): Text fed to the embedder.
+
+    Returns:
+        str: Hex digest used to detect edited items.
+    """
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def _atomic_write_json(path, data):
+    # Unique per writer, so concurrent writers never rename each other's temp file
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+class EmbeddingStore:
+    """
+    On-disk, memory-mapped embedding matrix keyed by item id and content hash.
+
+    Layout of store_dir:
+        embeddings.f32  raw float32 matrix, one L2-normalized row per item
+        manifest.json   model name, dimension, and the id/hash of every row
+
+    Rows are appended when items are added, rewritten in place when an item's
+    text changes, and the matrix is compacted when items are removed, so only
+    new or edited items are ever re-encoded.
+    """
+
+    def __init__(self, store_dir, embedder, model_name):
+        self.store_dir = store_dir
+        self.embedder = embedder
+        self.model_name = model_name
+        self.ids = []
+        self.hashes = []
+        self.dim = None
+        self.matrix = None
+        self._row_of = {}
+        self.load()
+
+    @property
+    def matrix_path(self):
+        return os.path.join(self.store_dir, MATRIX_FILE)
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.store_dir, MANIFEST_FILE)
+
+    def load(self):
+        """Memory-map the persisted matrix, discarding it if it was built with another model."""
+        self.ids, self.hashes, self.dim, self.matrix = [], [], None, None
+        if os.path.exists(self.manifest_path) and os.path.exists(self.matrix_path):
+            with open(self.manifest_path) as f:
+                manifest = json.load(f)
+            if manifest.get("model") == self.model_name:
+                self.ids = manifest["ids"]
+                self.hashes = manifest["hashes"]
+                self.dim = manifest["dim"]
+                self._map_matrix()
+            else:
+                print(f"Embedding store at {self.store_dir} was built with {manifest.get('model')}, rebuilding.")
+                self._discard_matrix()
+        elif os.path.exists(self.matrix_path):
+            # Rows without a manifest cannot be attributed to ids
+            self._discard_matrix()
+        self._row_of = {item_id: row for row, item_id in enumerate(self.ids)}
+
+    def _discard_matrix(self):
+        self.matrix = None
+        os.remove(self.matrix_path)
+
+    def _map_matrix(self, mode="r"):
+        if self.ids:
+            self.matrix = np.memmap(self.matrix_path, dtype=np.float32, mode=mode, shape=(len(self.ids), self.dim))
+        else:
+            self.matrix = np.empty((0, self.dim or 0), dtype=np.float32)
+
+    def _encode(self, texts):
+        embeddings = self.embedder.encode(texts, convert_to_numpy=True, normalize_embeddings=True)
+        return np.asarray(embeddings, dtype=np.float32)
+
+    def _save_manifest(self):
+        _atomic_write_json(self.manifest_path, {
+            "model": self.model_name,
+            "dim": self.dim,
+            "ids": self.ids,
+            "hashes": self.hashes,
+        })
+
+    def sync(self, items, remove_missing=True):
+        """
+        Bring the store in line with the given items.
+
+        Args:
+            items (dict): Mapping of item id -> text to embed.
+            remove_missing (bool): Drop stored items that are not in items. With False,
+                items are only added or updated (upsert).
+
+        Returns:
+            dict: Counts of added, updated and removed items.
+        """
+        os.makedirs(self.store_dir, exist_ok=True)
+        hashes = {item_id: content_hash(text) for item_id, text in items.items()}
+
+        removed = [item_id for item_id in self.ids if item_id not in hashes] if remove_missing else []
+        if removed:
+            self._compact(set(removed))
+
+        updated = [
+            item_id for item_id in hashes
+            if item_id in self._row_of and self.hashes[self._row_of[item_id]] != hashes[item_id]
+        ]
+        added = [item_id for item_id in hashes if item_id not in self._row_of]
+
+        if updated:
+            vectors = self._encode([items[item_id] for item_id in updated])
+            self._map_matrix(mode="r+")
+            for item_id, vector in zip(updated, vectors):
+                row = self._row_of[item_id]
+                self.matrix[row] = vector
+                self.hashes[row] = hashes[item_id]
+            self.matrix.flush()
+
+        if added:
+            vectors = self._encode([items[item_id] for item_id in added])
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+            # Write right after the rows the manifest knows about, overwriting any
+            # bytes left behind by a run that crashed before saving its manifest
+            self.matrix = None
+            with open(self.matrix_path, "r+b" if os.path.exists(self.matrix_path) else "w+b") as f:
+                f.seek(len(self.ids) * self.dim * 4)
+                f.write(vectors.tobytes())
+                f.truncate()
+            for item_id in added:
+                self._row_of[item_id] = len(self.ids)
+                self.ids.append(item_id)
+                self.hashes.append(hashes[item_id])
+
+        if removed or updated or added:
+            self._save_manifest()
+            self._map_matrix()
+
+        return {"added": len(added), "updated": len(updated), "removed": len(removed)}
+
+    def _compact(self, removed):
+        keep = [row for row, item_id in enumerate(self.ids) if item_id not in removed]
+        tmp_path = self.matrix_path + ".tmp"
+        if keep:
+            compacted = np.memmap(tmp_path, dtype=np.float32, mode="w+", shape=(len(keep), self.dim))
+            compacted[:] = self.matrix[keep]
+            compacted.flush()
+            del compacted
+        else:
+            open(tmp_path, "wb").close()
+        self.matrix = None
+        os.replace(tmp_path, self.matrix_path)
+
+        self.ids = [self.ids[row] for row in keep]
+        self.hashes = [self.hashes[row] for row in keep]
+        self._row_of = {item_id: row for row, item_id in enumerate(self.ids)}
+        self._save_manifest()
+        self._map_matrix()
+
+    def encode_query(self, texts):
+        """Encode query texts with the same normalization as the stored rows."""
+        return self._encode(texts)
@@ -0,0 +1,183 @@
+# llm_cache.py
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+LLM_CACHE_PATH = "llm_cache/responses.sqlite"
+LLM_CACHE_MAX_ENTRIES = 10000
+LLM_CACHE_TTL_SECONDS = 7 * 24 * 3600
+# How long a write waits for another process (e.g. a batch worker) holding the database lock
+LLM_CACHE_BUSY_TIMEOUT_SECONDS = 30
+
+
+def cache_key(model, system_prompt, user_prompt):
+    """
+    Content address of a prompt.
+
+    Args:
+        model (str): LLM model name
+        system_prompt (str): System message content
+        user_prompt (str): User message content
+
+    Returns:
+        str: SHA-256 hex digest identifying the request
+    """
+    digest = hashlib.sha256()
+    for part in (model, system_prompt, user_prompt):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class LLMCache:
+    """
+    Persistent LLM response cache backed by SQLite.
+
+    Entries are keyed by model name, system prompt and user prompt. The cache
+    holds at most max_entries responses, evicting the least recently used
+    ones, and treats entries older than ttl_seconds as misses.
+    """
+
+    def __init__(self, path=LLM_CACHE_PATH, max_entries=LLM_CACHE_MAX_ENTRIES, ttl_seconds=LLM_CACHE_TTL_SECONDS):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=LLM_CACHE_BUSY_TIMEOUT_SECONDS, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses (last_access)")
+        self._conn.commit()
+
+    def get(self, model, system_prompt, user_prompt):
+        """Return the cached response text, or None on a miss or an expired entry."""
+        key = cache_key(model, system_prompt, user_prompt)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT response, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            response, created_at = row
+            if self.ttl_seconds is not None and now - created_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return response
+
+    def put(self, model, system_prompt, user_prompt, response):
+        """Store a response and evict least recently used entries beyond max_entries."""
+        key = cache_key(model, system_prompt, user_prompt)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, response, created_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, model, response, now, now)
+            )
+            if self.ttl_seconds is not None:
+                self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,))
+            overflow = self._count() - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY last_access ASC LIMIT ?)",
+                    (overflow,)
+                )
+            self._conn.commit()
+
+    def _count(self):
+        return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def stats(self):
+        """Hit/miss counters for this process and the number of stored entries."""
+        with self._lock:
+            entries = self._count()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / lookups) * 100 if lookups > 0 else 0,
+            "entries": entries,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache():
+    """Process-wide LLM response cache."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = LLMCache()
+        return _cache
+
+
+def _split_messages(messages):
+    system_prompt = "\n".join(m.content for m in messages if m.type == "system")
+    user_prompt = "\n".join(m.content for m in messages if m.type != "system")
+    return system_prompt, user_prompt
+
+
+def cached_invoke(llm, messages, cache=None, validate=None):
+    """
+    llm.invoke(messages) answered from the response cache when possible.
+    If validate is given, a response is only cached when validate(content) is true,
+    so a malformed reply is retried on the next call instead of replayed until it expires.
+
+    Returns:
+        str: Response content
+    """
+    cache = cache or get_llm_cache()
+    system_prompt, user_prompt = _split_messages(messages)
+    cached = cache.get(llm.model, system_prompt, user_prompt)
+    if cached is not None:
+        return cached
+    content = llm.invoke(messages).content
+    if validate is None or validate(content):
+        cache.put(llm.model, system_prompt, user_prompt, content)
+    return content
+
+
+async def cached_ainvoke(llm, messages, cache=None, validate=None):
+    """
+    Async variant of cached_invoke built on llm.ainvoke.
+
+    Returns:
+        str: Response content
+    """
+    cache = cache or get_llm_cache()
+    system_prompt, user_prompt = _split_messages(messages)
+    cached = cache.get(llm.model, system_prompt, user_prompt)
+    if cached is not None:
+        return cached
+    content = (await llm.ainvoke(messages)).content
+    if validate is None or validate(content):
+        cache.put(llm.model, system_prompt, user_prompt, content)
+    return content
@@ -0,0 +1,123 @@
+# model_registry.py
+import os
+import sys
+import threading
+import time
+
+
+def process_start_time():
+    """
+    perf_counter() reading at which this process started, so startup time includes
+    interpreter start-up and every import. Read from /proc on Linux; elsewhere the
+    time this module is first imported is used instead.
+    """
+    try:
+        with open("/proc/self/stat") as f:
+            # starttime (field 22) in clock ticks since boot; fields are counted after the ")" of the name
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return time.perf_counter() - max(uptime - start_ticks / os.sysconf("SC_CLK_TCK"), 0.0)
+    except (OSError, ValueError, IndexError, AttributeError):
+        return time.perf_counter()
+
+
+STARTED_AT = process_start_time()
+
+EMBED_MODEL_NAME = "all-MiniLM-L6-v2"
+LLM_MODEL_NAME = "mistral"  # TODO: Evaluate "llama3" later
+
+# Startup budget for a rule-based run, in seconds
+STARTUP_BUDGET_SECONDS = 1.0
+
+# Heavy dependencies reported by startup_report() when they have been imported
+HEAVY_MODULES = (
+    "torch", "sentence_transformers", "langchain", "langchain_ollama", "llama_index",
+    "faiss", "matplotlib", "streamlit", "pyarrow", "pandas",
+)
+
+_models = {}
+_reported = set()
+_load_seconds = {}
+_locks = {}
+_registry_lock = threading.Lock()
+
+
+def get_model(key, loader):
+    """
+    Returns the model registered under key, calling loader() the first time.
+    Concurrent first calls for the same key load the model only once.
+    """
+    model = _models.get(key)
+    if model is not None:
+        return model
+    with _registry_lock:
+        lock = _locks.setdefault(key, threading.Lock())
+    with lock:
+        if key not in _models:
+            start = time.perf_counter()
+            _models[key] = loader()
+            _load_seconds[key] = time.perf_counter() - start
+            print(f"Loaded {key} in {_load_seconds[key]:.2f}s")
+        return _models[key]
+
+
+def get_embedder(model_name=EMBED_MODEL_NAME):
+    """Shared SentenceTransformer, loaded on first use."""
+    def load():
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(model_name)
+    return get_model(f"embedder:{model_name}", load)
+
+
+def get_chat_llm(model_name=LLM_MODEL_NAME):
+    """Shared ChatOllama client, created on first use."""
+    def load():
+        from langchain_ollama import ChatOllama
+        return ChatOllama(model=model_name)
+    return get_model(f"llm:{model_name}", load)
+
+
+class LazyEmbedder:
+    """
+    Stand-in for the shared embedder that loads it only when something is encoded,
+    so an embedding store with nothing new to encode never loads the model.
+    """
+
+    def __init__(self, model_name=EMBED_MODEL_NAME):
+        self.model_name = model_name
+
+    def encode(self, *args, **kwargs):
+        return get_embedder(self.model_name).encode(*args, **kwargs)
+
+
+def startup_report():
+    """
+    Returns:
+        dict: Seconds since process start, whether that is within STARTUP_BUDGET_SECONDS,
+        load time of every model loaded so far, and which heavy modules are imported
+    """
+    elapsed = time.perf_counter() - STARTED_AT
+    return {
+        "elapsed_seconds": round(elapsed, 3),
+        "budget_seconds": STARTUP_BUDGET_SECONDS,
+        "within_budget": elapsed <= STARTUP_BUDGET_SECONDS,
+        "models": {key: round(seconds, 3) for key, seconds in _load_seconds.items()},
+        "heavy_modules": [name for name in HEAVY_MODULES if name in sys.modules],
+    }
+
+
+def print_startup_report(label="startup", once=False):
+    """
+    Prints startup_report(); entry points call it right after their imports.
+    With once=True a label is reported only the first time in a process (Streamlit reruns scripts).
+    """
+    if once:
+        if label in _reported:
+            return None
+        _reported.add(label)
+    report = startup_report()
+    status = "within" if report["within_budget"] else "OVER"
+    print(f"[{label}] {report['elapsed_seconds']:.2f}s ({status} {report['budget_seconds']:.1f}s budget), "
+          f"models: {report['models'] or 'none'}, heavy modules: {', '.join(report['heavy_modules']) or 'none'}")
+    return report
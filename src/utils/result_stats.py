@@ -0,0 +1,151 @@
+# result_stats.py
+import numpy as np
+import pandas as pd
+
+RESULT_LABELS = ["PASS", "FAIL", "SKIPPED"]
+
+# Summary keys for each result label, as reported by run_reporter_agent
+SUMMARY_KEYS = {"PASS": ("passed", "pass_rate"), "FAIL": ("failed", "fail_rate"), "SKIPPED": ("skipped", "skip_rate")}
+
+
+class _Labels:
+    """Growable label -> position mapping."""
+
+    def __init__(self, labels=()):
+        self.labels = []
+        self.position = {}
+        for label in labels:
+            self.add(label)
+
+    def add(self, label):
+        if label not in self.position:
+            self.position[label] = len(self.labels)
+            self.labels.append(label)
+        return self.position[label]
+
+    def codes_for(self, uniques):
+        return np.array([self.add(label) for label in uniques], dtype=np.int64)
+
+
+def _is_missing(value):
+    return value is None or (isinstance(value, float) and np.isnan(value))
+
+
+def _global_codes(column, labels):
+    """
+    Codes of a column in terms of labels (a _Labels), -1 for missing values.
+    Categorical columns reuse their codes instead of re-factorizing.
+    """
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        codes, uniques = np.asarray(column.cat.codes, dtype=np.int64), list(column.cat.categories)
+    else:
+        codes, uniques = pd.factorize(column, use_na_sentinel=True)
+    if len(uniques) == 0:
+        return np.full(len(column), -1, dtype=np.int64)
+    return np.where(codes >= 0, labels.codes_for(uniques)[codes], -1)
+
+
+class ResultAggregator:
+    """
+    Running counts of test results, overall and per domain and category.
+
+    Every breakdown is a (keys x results) count matrix. A DataFrame update
+    factorizes each column once and folds all rows into the matrices with a
+    single np.bincount per breakdown. Single records (streamed results) update
+    the same matrices in place, so the summary is current at any point.
+    """
+
+    def __init__(self, group_columns=("domain", "category")):
+        self.group_columns = list(group_columns)
+        self.results = _Labels(RESULT_LABELS)
+        self.total = 0
+        self.counts = np.zeros(len(self.results.labels), dtype=np.int64)
+        self.groups = {column: _Labels() for column in self.group_columns}
+        self.matrices = {column: np.zeros((0, len(self.results.labels)), dtype=np.int64) for column in self.group_columns}
+
+    def _grow(self):
+        n_results = len(self.results.labels)
+        if len(self.counts) < n_results:
+            self.counts = np.pad(self.counts, (0, n_results - len(self.counts)))
+        for column, matrix in self.matrices.items():
+            rows = len(self.groups[column].labels) - matrix.shape[0]
+            cols = n_results - matrix.shape[1]
+            if rows or cols:
+                self.matrices[column] = np.pad(matrix, ((0, rows), (0, cols)))
+
+    def update(self, df):
+        """
+        Adds every row of an executor results DataFrame.
+
+        Args:
+            df (pd.DataFrame): Must have a "result" column; group columns are optional
+
+        Returns:
+            ResultAggregator: self
+        """
+        if len(df) == 0:
+            return self
+        result_codes = _global_codes(df["result"], self.results)
+        grouped = {
+            column: _global_codes(df[column], self.groups[column])
+            for column in self.group_columns if column in df.columns
+        }
+        self._grow()
+
+        n_results = len(self.results.labels)
+        self.total += len(df)
+        has_result = result_codes >= 0
+        self.counts += np.bincount(result_codes[has_result], minlength=n_results)
+        for column, group_codes in grouped.items():
+            valid = has_result & (group_codes >= 0)
+            flat = group_codes[valid] * n_results + result_codes[valid]
+            n_groups = len(self.groups[column].labels)
+            self.matrices[column] += np.bincount(flat, minlength=n_groups * n_results).reshape(n_groups, n_results)
+        return self
+
+    def add(self, record):
+        """Adds one result record (a dict with "result" and optionally the group columns)."""
+        self.total += 1
+        result = record.get("result")
+        if _is_missing(result):
+            return self
+        result_code = self.results.add(result)
+        group_codes = {
+            column: self.groups[column].add(record[column])
+            for column in self.group_columns if not _is_missing(record.get(column))
+        }
+        self._grow()
+        self.counts[result_code] += 1
+        for column, code in group_codes.items():
+            self.matrices[column][code, result_code] += 1
+        return self
+
+    def count(self, result):
+        position = self.results.position.get(result)
+        return 0 if position is None else int(self.counts[position])
+
+    def summary(self):
+        """Overall counts and rates (percent), keyed as in run_reporter_agent."""
+        summary = {"total": self.total}
+        for label, (count_key, _) in SUMMARY_KEYS.items():
+            summary[count_key] = self.count(label)
+        for label, (count_key, rate_key) in SUMMARY_KEYS.items():
+            summary[rate_key] = (summary[count_key] / self.total) * 100 if self.total > 0 else 0
+        return summary
+
+    def breakdown(self, column):
+        """
+        Group x result counts, like df.groupby([column, "result"]).size().unstack(fill_value=0).
+
+        Returns:
+            pd.DataFrame: One row per group and one column per observed result, both sorted
+        """
+        matrix = self.matrices[column]
+        rows = np.flatnonzero(matrix.sum(axis=1))
+        cols = np.flatnonzero(matrix.sum(axis=0))
+        table = pd.DataFrame(
+            matrix[np.ix_(rows, cols)],
+            index=pd.Index([self.groups[column].labels[i] for i in rows], name=column),
+            columns=pd.Index([self.results.labels[i] for i in cols], name="result"),
+        )
+        return table.sort_index().sort_index(axis=1)
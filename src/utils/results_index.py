@@ -0,0 +1,98 @@
+# results_index.py
+import json
+import os
+import threading
+from datetime import datetime, timezone
+
+import numpy as np
+
+from utils.embedding_store import EmbeddingStore, _atomic_write_json
+
+REPORTER_INDEX_DIR = "reporter_index"
+HISTORY_FILE = "history.json"
+
+# Number of most recent results kept per test
+HISTORY_LENGTH = 20
+
+
+class ResultsIndex:
+    """
+    Persistent semantic index over executed tests, keyed by test id.
+
+    Titles are embedded once into an EmbeddingStore; later runs only encode
+    tests that are new or whose title changed. Every test also keeps its most
+    recent results, so a search hit carries its result history.
+    update() and search() are serialized, so one index can be shared by threads.
+    """
+
+    def __init__(self, embedder, model_name, index_dir=REPORTER_INDEX_DIR):
+        self.index_dir = index_dir
+        self.store = EmbeddingStore(index_dir, embedder, model_name)
+        self.tests = {}
+        self._lock = threading.Lock()
+        if os.path.exists(self.history_path):
+            with open(self.history_path) as f:
+                self.tests = json.load(f)
+
+    @property
+    def history_path(self):
+        return os.path.join(self.index_dir, HISTORY_FILE)
+
+    def update(self, execution_df, run_label=None):
+        """
+        Adds a run to the index.
+
+        Args:
+            execution_df (pd.DataFrame): Executor results (id, title, domain, result)
+            run_label (str | None): Label stored with each result, defaults to the current UTC time
+
+        Returns:
+            dict: Counts of added, updated and removed embeddings
+        """
+        run_label = run_label or datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        rows = execution_df[["id", "title", "domain", "result"]].itertuples(index=False, name=None)
+        with self._lock:
+            titles = {}
+            for test_id, title, domain, result in rows:
+                test_id = str(test_id)
+                titles[test_id] = title if isinstance(title, str) else ""
+                entry = self.tests.setdefault(test_id, {"history": []})
+                entry["title"] = titles[test_id]
+                entry["domain"] = domain
+                entry["history"] = (entry["history"] + [[run_label, result]])[-HISTORY_LENGTH:]
+
+            changes = self.store.sync(titles, remove_missing=False)
+            os.makedirs(self.index_dir, exist_ok=True)
+            _atomic_write_json(self.history_path, self.tests)
+            return changes
+
+    def search(self, query, k=3):
+        """
+        Finds the tests whose titles are closest to the query.
+
+        Returns:
+            list[dict]: Up to k hits (id, title, domain, latest result, score, history), best first
+        """
+        with self._lock:
+            if not self.store.ids:
+                return []
+            query_vector = self.store.encode_query([query])[0]
+            scores = self.store.matrix @ query_vector
+            k = min(k, len(scores))
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+
+            matches = []
+            for row in top:
+                test_id = self.store.ids[row]
+                entry = self.tests.get(test_id, {})
+                history = entry.get("history", [])
+                matches.append({
+                    "id": test_id,
+                    "title": entry.get("title"),
+                    "domain": entry.get("domain"),
+                    "result": history[-1][1] if history else None,
+                    "score": float(scores[row]),
+                    "history": [{"run": run, "result": result} for run, result in history],
+                })
+            return matches
@@ -0,0 +1,241 @@
+# results_store.py
+import os
+import uuid
+from datetime import datetime, timezone
+from urllib.parse import quote
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+RESULTS_STORE_DIR = "results_store"
+WRITE_BATCH_SIZE = 5000
+
+_stores = {}
+
+RESULT_SCHEMA = pa.schema([
+    ("id", pa.string()),
+    ("title", pa.string()),
+    ("domain", pa.string()),
+    ("category", pa.string()),
+    ("result", pa.string()),
+    ("sut", pa.string()),
+    ("duration_seconds", pa.float64()),
+    ("note", pa.string()),
+])
+
+PARTITION_KEYS = ("testplan_id", "milestone", "run_ts")
+PARTITION_SCHEMA = pa.schema([(key, pa.string()) for key in PARTITION_KEYS])
+
+
+def new_run_ts():
+    """Sortable UTC run timestamp, safe to use as a directory name."""
+    return datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+
+
+def new_run_id(run_ts=None):
+    """
+    Unique id of a run: its timestamp (now by default) plus the writing process and a
+    random suffix, so runs started at the same instant never share a partition.
+    Ids still sort by timestamp.
+    """
+    return f"{run_ts or new_run_ts()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+
+def and_filters(*filters):
+    """Combines dataset filters with AND, skipping None."""
+    combined = None
+    for condition in filters:
+        if condition is not None:
+            combined = condition if combined is None else combined & condition
+    return combined
+
+
+def plan_filter(testplan_id=None, milestone=None):
+    return and_filters(*(
+        pc.field(key) == value for key, value in (("testplan_id", testplan_id), ("milestone", milestone))
+        if value is not None
+    ))
+
+
+def domain_filter(domain):
+    """Dataset filter for a domain and its sub-domains (connectivity matches connectivity.wifi)."""
+    return (pc.field("domain") == domain) | pc.starts_with(pc.field("domain"), domain + ".")
+
+
+class RunWriter:
+    """
+    Appends the results of one run to its partition.
+
+    Rows are buffered and written as Parquet row groups of batch_size, so a run
+    is never held in memory as a whole. The file is written under an
+    underscore-prefixed name, which dataset discovery ignores, and renamed into
+    place on close. A run that fails or is cancelled is aborted instead, which
+    deletes the staged file, so readers only ever see complete runs.
+    """
+
+    def __init__(self, run_dir, testplan_id, milestone, run_ts, batch_size=WRITE_BATCH_SIZE):
+        self.run_dir = run_dir
+        self.testplan_id = testplan_id
+        self.milestone = milestone
+        self.run_ts = run_ts
+        self.batch_size = batch_size
+        self.count = 0
+        name = f"part-{uuid.uuid4().hex}.parquet"
+        self.path = os.path.join(run_dir, name)
+        self._tmp_path = os.path.join(run_dir, "_inprogress-" + name)
+        self._batch = []
+        self._writer = None
+
+    def append(self, record):
+        self._batch.append(record)
+        if len(self._batch) >= self.batch_size:
+            self.flush()
+
+    def extend(self, records):
+        for record in records:
+            self.append(record)
+
+    def flush(self):
+        if not self._batch:
+            return
+        if self._writer is None:
+            os.makedirs(self.run_dir, exist_ok=True)
+            self._writer = pq.ParquetWriter(self._tmp_path, RESULT_SCHEMA)
+        columns = {name: [record.get(name) for record in self._batch] for name in RESULT_SCHEMA.names}
+        columns["duration_seconds"] = [
+            None if value is None else float(value) for value in columns["duration_seconds"]
+        ]
+        for name in RESULT_SCHEMA.names:
+            if name != "duration_seconds":
+                columns[name] = [None if value is None else str(value) for value in columns[name]]
+        self._writer.write_table(pa.table(columns, schema=RESULT_SCHEMA))
+        self.count += len(self._batch)
+        self._batch.clear()
+
+    def close(self):
+        self.flush()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+            os.replace(self._tmp_path, self.path)
+
+    def abort(self):
+        """Discards the run: nothing buffered or staged is published."""
+        self._batch.clear()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+        try:
+            # Only removed if no other writer published to the same partition
+            os.rmdir(self.run_dir)
+        except OSError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class ResultsStore:
+    """
+    Append-only store of executor results.
+
+    Every run is a Hive-style partition testplan_id=<id>/milestone=<m>/run_ts=<ts>
+    holding Parquet files. Queries go through pyarrow.dataset, so partition
+    and column filters are pushed down and only matching files are read.
+    """
+
+    def __init__(self, root=RESULTS_STORE_DIR):
+        self.root = root
+
+    def open_run(self, testplan_id, milestone, run_ts=None, batch_size=WRITE_BATCH_SIZE):
+        """
+        Starts a new run partition.
+
+        Args:
+            run_ts (str | None): Timestamp the run id starts with, defaults to now; the
+                partition's run_ts value is the unique id from new_run_id
+
+        Returns:
+            RunWriter: Use as a context manager, or call close() when the run ends
+        """
+        run_ts = new_run_id(run_ts)
+        values = {"testplan_id": testplan_id or "unknown", "milestone": milestone or "unknown", "run_ts": run_ts}
+        run_dir = os.path.join(self.root, *(f"{key}={quote(str(values[key]), safe='')}" for key in PARTITION_KEYS))
+        return RunWriter(run_dir, values["testplan_id"], values["milestone"], run_ts, batch_size=batch_size)
+
+    def dataset(self):
+        return ds.dataset(
+            self.root, format="parquet",
+            partitioning=ds.partitioning(PARTITION_SCHEMA, flavor="hive")
+        )
+
+    def query(self, filter=None, columns=None):
+        """
+        Reads results matching filter (a pyarrow.compute expression).
+
+        Returns:
+            pyarrow.Table: Matching rows, including the partition columns
+        """
+        if not os.path.isdir(self.root):
+            empty = pa.schema(list(RESULT_SCHEMA) + list(PARTITION_SCHEMA)).empty_table()
+            return empty.select(columns) if columns else empty
+        return self.dataset().to_table(filter=filter, columns=columns)
+
+    def list_runs(self, testplan_id=None, milestone=None):
+        """Run ids (see new_run_id), oldest first, optionally restricted to one test plan and milestone."""
+        if not os.path.isdir(self.root):
+            return []
+        # Partition keys come from the directory names, so no file is opened
+        fragments = self.dataset().get_fragments(filter=plan_filter(testplan_id, milestone))
+        return sorted({ds.get_partition_keys(fragment.partition_expression)["run_ts"] for fragment in fragments})
+
+    def _last_runs_filter(self, last_n_runs, testplan_id=None, milestone=None):
+        runs_filter = None
+        if last_n_runs:
+            runs_filter = pc.field("run_ts").isin(self.list_runs(testplan_id, milestone)[-last_n_runs:])
+        return and_filters(plan_filter(testplan_id, milestone), runs_filter)
+
+    def fail_rate(self, domain, last_n_runs=20, testplan_id=None, milestone=None):
+        """
+        Share of FAIL results for a domain (and its sub-domains) over the most recent runs.
+
+        Returns:
+            float | None: Fail rate, or None if the domain has no results in those runs
+        """
+        filter = and_filters(domain_filter(domain), self._last_runs_filter(last_n_runs, testplan_id, milestone))
+        results = self.query(filter=filter, columns=["result"]).column("result")
+        if len(results) == 0:
+            return None
+        return pc.sum(pc.equal(results, "FAIL")).as_py() / len(results)
+
+    def durations(self, last_n_runs=20, testplan_id=None, milestone=None):
+        """
+        Mean duration per test over the most recent runs, for the scheduler.
+
+        Returns:
+            dict: test id -> mean duration in seconds (tests that never ran are left out)
+        """
+        # Tests that never started (no SUT) have no meaningful duration
+        filter = and_filters(pc.field("sut").is_valid(), self._last_runs_filter(last_n_runs, testplan_id, milestone))
+        table = self.query(filter=filter, columns=["id", "duration_seconds"])
+        if table.num_rows == 0:
+            return {}
+        means = table.group_by("id").aggregate([("duration_seconds", "mean")])
+        return dict(zip(means.column("id").to_pylist(), means.column("duration_seconds_mean").to_pylist()))
+
+
+def get_results_store(root=RESULTS_STORE_DIR):
+    """Process-wide results store that orchestration runs append to by default."""
+    if root not in _stores:
+        _stores[root] = ResultsStore(root)
+    return _stores[root]
@@ -0,0 +1,264 @@
+# run_history.py
+import os
+import threading
+import uuid
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+import pyarrow.compute as pc
+
+from utils.results_store import and_filters, plan_filter
+
+# Cell codes of the history matrix; NOT_RUN marks a test absent from a run
+NOT_RUN, PASS, FAIL, SKIPPED = 0, 1, 2, 3
+RESULT_CODES = {"PASS": PASS, "FAIL": FAIL, "SKIPPED": SKIPPED}
+
+FLAKY_WINDOW = 20
+
+# Saved segments are merged into one once there are more than this many
+HISTORY_MAX_SEGMENTS = 32
+
+
+def previous_outcomes(matrix):
+    """
+    For every cell, the most recent earlier PASS/FAIL outcome of the same test (NOT_RUN if none).
+    SKIPPED and NOT_RUN cells are looked through, so a skip does not hide a regression.
+    """
+    n_runs = matrix.shape[1]
+    executed = (matrix == PASS) | (matrix == FAIL)
+    last = np.where(executed, np.arange(n_runs, dtype=np.int32), np.int32(-1))
+    np.maximum.accumulate(last, axis=1, out=last)
+    prev = np.full_like(last, -1)
+    prev[:, 1:] = last[:, :-1]
+    outcomes = np.take_along_axis(matrix, np.maximum(prev, 0), axis=1)
+    outcomes[prev < 0] = NOT_RUN
+    return outcomes
+
+
+class RunHistory:
+    """
+    Indexed result history: a (tests x runs) int8 matrix of result codes.
+
+    Runs are columns in run id order and tests are rows. The matrix is
+    persisted as .npz segments next to the results store, each holding the runs
+    of one sync, so saving writes only the new runs and sync() reads only runs
+    added since the last sync; analysis never rescans old partitions.
+    """
+
+    def __init__(self, test_ids=(), domains=(), runs=(), matrix=None):
+        self.test_ids = list(test_ids)
+        self.domains = list(domains)
+        self.runs = list(runs)
+        self.matrix = matrix if matrix is not None else np.zeros((len(self.test_ids), len(self.runs)), dtype=np.int8)
+        self._row_of = {test_id: row for row, test_id in enumerate(self.test_ids)}
+        # Runs already in saved segments, and how many segments hold them
+        self._saved_runs = 0
+        self._segments = []
+
+    @classmethod
+    def load(cls, path):
+        """Merges every segment in the path directory; runs found in more than one segment are kept once."""
+        history = cls()
+        if not os.path.isdir(path):
+            return history
+        for name in sorted(os.listdir(path)):
+            if name.startswith("_") or not name.endswith(".npz"):
+                continue
+            with np.load(os.path.join(path, name), allow_pickle=False) as data:
+                history._append(data["test_ids"].tolist(), data["domains"].tolist(), data["runs"].tolist(), data["matrix"])
+            history._segments.append(name)
+        # Segments written concurrently can interleave; keep columns in run order
+        order = np.argsort(history.runs, kind="stable")
+        if len(order) and (order != np.arange(len(order))).any():
+            history.runs = [history.runs[i] for i in order]
+            history.matrix = history.matrix[:, order]
+        history._saved_runs = len(history.runs)
+        return history
+
+    def save(self, path):
+        """
+        Writes the runs added since the last load or save as a new segment in the path
+        directory. Past HISTORY_MAX_SEGMENTS, or after a rebuild, the whole history is
+        written as one segment and the older segments are removed.
+        """
+        os.makedirs(path, exist_ok=True)
+        compact = self._saved_runs == 0 or len(self._segments) >= HISTORY_MAX_SEGMENTS
+        first = 0 if compact else self._saved_runs
+        if first == len(self.runs):
+            return
+        block = self.matrix[:, first:]
+        rows = np.arange(len(self.test_ids)) if compact else np.flatnonzero(block.any(axis=1))
+
+        name = f"{self.runs[first]}-{uuid.uuid4().hex[:8]}.npz"
+        # Unique per writer, so batch workers saving the same history never clobber each other
+        tmp_path = os.path.join(path, f"_{os.getpid()}.{threading.get_ident()}.tmp.npz")
+        np.savez(
+            tmp_path, test_ids=np.array([self.test_ids[i] for i in rows], dtype=str),
+            domains=np.array([self.domains[i] for i in rows], dtype=str),
+            runs=np.array(self.runs[first:], dtype=str), matrix=block[rows]
+        )
+        os.replace(tmp_path, os.path.join(path, name))
+        if compact:
+            for old in self._segments:
+                try:
+                    os.remove(os.path.join(path, old))
+                except FileNotFoundError:
+                    pass
+            self._segments = []
+        self._segments.append(name)
+        self._saved_runs = len(self.runs)
+
+    def _append(self, test_ids, domains, runs, block):
+        """Adds the columns of block (rows test_ids, columns runs) for runs not indexed yet."""
+        known = set(self.runs)
+        keep = [col for col, run in enumerate(runs) if run not in known]
+        if not keep:
+            return 0
+        for test_id, domain in zip(test_ids, domains):
+            if test_id not in self._row_of:
+                self._row_of[test_id] = len(self.test_ids)
+                self.test_ids.append(test_id)
+                self.domains.append(domain)
+
+        n_old_runs = len(self.runs)
+        self.runs.extend(runs[col] for col in keep)
+        grown = np.zeros((len(self.test_ids), len(self.runs)), dtype=np.int8)
+        grown[:self.matrix.shape[0], :n_old_runs] = self.matrix
+        rows = np.array([self._row_of[test_id] for test_id in test_ids], dtype=np.int64)
+        grown[rows[:, None], n_old_runs + np.arange(len(keep))] = np.asarray(block)[:, keep]
+        self.matrix = grown
+        return len(keep)
+
+    def sync(self, results_store, testplan_id=None, milestone=None):
+        """
+        Appends runs that are in the results store but not yet in the matrix.
+
+        Returns:
+            int: Number of runs added
+        """
+        all_runs = results_store.list_runs(testplan_id, milestone)
+        known = set(self.runs)
+        new_runs = [run for run in all_runs if run not in known]
+        if not new_runs:
+            return 0
+        if self.runs and min(new_runs) < self.runs[-1]:
+            # A backfilled run falls between indexed ones; rebuild so columns stay in run order
+            print("Run history out of order, rebuilding from the results store")
+            segments = self._segments
+            self.__init__()
+            self._segments = segments
+            new_runs = all_runs
+
+        table = results_store.query(
+            filter=and_filters(plan_filter(testplan_id, milestone), pc.field("run_ts").isin(new_runs)),
+            columns=["id", "domain", "result", "run_ts"]
+        )
+        ids = table.column("id").to_numpy(zero_copy_only=False)
+        domains = table.column("domain").to_numpy(zero_copy_only=False)
+        new_ids, first, rows = np.unique(ids, return_index=True, return_inverse=True)
+
+        block = np.zeros((len(new_ids), len(new_runs)), dtype=np.int8)
+        cols = pd.Index(new_runs).get_indexer(table.column("run_ts").to_numpy(zero_copy_only=False))
+        results = table.column("result").to_pandas()
+        block[rows, cols] = results.map(RESULT_CODES).fillna(NOT_RUN).to_numpy(dtype=np.int8)
+        return self._append(new_ids.tolist(), [domains[i] or "" for i in first.tolist()], new_runs, block)
+
+    def _window(self, window):
+        return self.matrix if not window else self.matrix[:, -window:]
+
+    def transitions(self, window=None):
+        """
+        PASS->FAIL transitions per test.
+
+        Returns:
+            pd.DataFrame: id, domain, regressions (PASS->FAIL count), regressed (latest outcome
+            is still FAIL), regressed_in (run of the most recent PASS->FAIL), for tests with at
+            least one transition; currently regressed tests first, newest regressions first
+        """
+        matrix = self._window(window)
+        prev = previous_outcomes(matrix)
+        events = (prev == PASS) & (matrix == FAIL)
+        counts = events.sum(axis=1)
+
+        n_runs = matrix.shape[1]
+        rows = np.arange(matrix.shape[0])
+        executed = (matrix == PASS) | (matrix == FAIL)
+        last_outcome = matrix[rows, n_runs - 1 - np.argmax(executed[:, ::-1], axis=1)] if n_runs else np.zeros(0)
+        last_event = n_runs - 1 - np.argmax(events[:, ::-1], axis=1) if n_runs else np.zeros(0, dtype=int)
+
+        hit = np.flatnonzero(counts)
+        runs = self.runs[-n_runs:] if n_runs else []
+        table = pd.DataFrame({
+            "id": [self.test_ids[i] for i in hit],
+            "domain": [self.domains[i] for i in hit],
+            "regressions": counts[hit],
+            "regressed": last_outcome[hit] == FAIL,
+            "regressed_in": [runs[last_event[i]] for i in hit],
+        })
+        return table.sort_values(["regressed", "regressed_in"], ascending=False, ignore_index=True)
+
+    def flakiness(self, window=FLAKY_WINDOW):
+        """
+        Flakiness score per test over the last window runs: outcome flips between
+        consecutive PASS/FAIL results divided by the possible flips.
+
+        Returns:
+            pd.DataFrame: id, domain, flakiness (0..1), executions, for tests that flipped at least once
+        """
+        matrix = self._window(window)
+        prev = previous_outcomes(matrix)
+        executed = (matrix == PASS) | (matrix == FAIL)
+        flips = (executed & (prev != NOT_RUN) & (matrix != prev)).sum(axis=1)
+        executions = executed.sum(axis=1)
+        scores = flips / np.maximum(executions - 1, 1)
+
+        hit = np.flatnonzero(flips)
+        return pd.DataFrame({
+            "id": [self.test_ids[i] for i in hit],
+            "domain": [self.domains[i] for i in hit],
+            "flakiness": scores[hit],
+            "executions": executions[hit],
+        }).sort_values("flakiness", ascending=False, ignore_index=True)
+
+    def hotspots(self, window=FLAKY_WINDOW):
+        """
+        Domains ranked by failures over the last window runs.
+
+        Returns:
+            pd.DataFrame: domain, executions, failures, fail_rate, regressions, flaky_tests
+        """
+        matrix = self._window(window)
+        prev = previous_outcomes(matrix)
+        executed = (matrix == PASS) | (matrix == FAIL)
+        per_test = pd.DataFrame({
+            "domain": self.domains,
+            "executions": executed.sum(axis=1),
+            "failures": (matrix == FAIL).sum(axis=1),
+            "regressions": ((prev == PASS) & (matrix == FAIL)).sum(axis=1),
+            "flaky_tests": (executed & (prev != NOT_RUN) & (matrix != prev)).any(axis=1),
+        })
+        table = per_test.groupby("domain", sort=False).sum()
+        table["fail_rate"] = table["failures"] / table["executions"].where(table["executions"] > 0)
+        table = table[["executions", "failures", "fail_rate", "regressions", "flaky_tests"]]
+        return table.sort_values(["failures", "fail_rate"], ascending=False).reset_index()
+
+
+def history_path(results_store, testplan_id=None, milestone=None):
+    """Directory of the indexed history segments for a plan/milestone; the underscore keeps it out of dataset discovery."""
+    key = "-".join(quote(str(value), safe="") for value in (testplan_id or "all", milestone or "all"))
+    return os.path.join(results_store.root, f"_run_history-{key}")
+
+
+def load_run_history(results_store, testplan_id=None, milestone=None):
+    """
+    Loads the indexed history and brings it up to date with the results store.
+
+    Returns:
+        RunHistory: History including every stored run
+    """
+    path = history_path(results_store, testplan_id, milestone)
+    history = RunHistory.load(path)
+    if history.sync(results_store, testplan_id, milestone):
+        history.save(path)
+    return history
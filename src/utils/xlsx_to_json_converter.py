@@ -1,38 +1,143 @@
+import argparse
 import json
-from openpyxl import load_workbook
+import os
 import re
+from openpyxl import load_workbook
 
-# Load workbook (formulas visible)
-wb = load_workbook("TCD_Baseline.xlsx", data_only=False)
-ws = wb.active
+# Regex to extract second argument (display text) from HYPERLINK
+HYPERLINK_PATTERN = re.compile(r'HYPERLINK\((?:"|\')?.*?(?:"|\')?,\s*(?:"|\')(.*?)(?:"|\')\)', re.IGNORECASE)
+HYPERLINK_MARKER = re.compile("HYPERLINK", re.IGNORECASE)
 
-# Extract headers
-headers = [cell.value for cell in next(ws.iter_rows(min_row=1, max_row=1))]
+PARQUET_BATCH_SIZE = 10000
 
-data = []
 
-# Regex to extract second argument (display text) from HYPERLINK
-hyperlink_pattern = re.compile(r'HYPERLINK\((?:"|\')?.*?(?:"|\')?,\s*(?:"|\')(.*?)(?:"|\')\)', re.IGNORECASE)
+def extract_cell_value(value):
+    """Normalize a cell and extract the display text if it's a HYPERLINK formula."""
+    if isinstance(value, str) and HYPERLINK_MARKER.search(value):
+        normalized = value.lstrip('=')  # Remove any leading ==
+        match = HYPERLINK_PATTERN.search(normalized)
+        if match:
+            return match.group(1)
+    return value
+
+
+def iter_rows(xlsx_path, sheet=None):
+    """
+    Streams the rows of a TCD export as dicts keyed by the header row.
+
+    The workbook is opened in read-only mode (formulas visible), so rows are
+    read lazily and memory use does not grow with the sheet size.
+    """
+    wb = load_workbook(xlsx_path, read_only=True, data_only=False)
+    try:
+        ws = wb[sheet] if sheet else wb.active
+        rows = ws.iter_rows(values_only=True)
+        headers = next(rows, None)
+        if headers is None:
+            return
+        for row in rows:
+            if all(value is None for value in row):
+                continue
+            yield {header: extract_cell_value(value) for header, value in zip(headers, row)}
+    finally:
+        wb.close()
+
+
+def write_json(rows, output_path):
+    """Writes rows as a JSON array, one row at a time."""
+    count = 0
+    with open(output_path, "w") as f:
+        f.write("[")
+        for row in rows:
+            f.write(",\n" if count else "\n")
+            f.write(json.dumps(row, indent=4, default=str))
+            count += 1
+        f.write("\n]\n")
+    return count
+
+
+def write_jsonl(rows, output_path):
+    """Writes rows as JSON Lines, one row at a time."""
+    count = 0
+    with open(output_path, "w") as f:
+        for row in rows:
+            f.write(json.dumps(row, default=str))
+            f.write("\n")
+            count += 1
+    return count
+
+
+def write_parquet(rows, output_path, batch_size=PARQUET_BATCH_SIZE):
+    """Writes rows to Parquet in row groups of batch_size. All cells are stored as strings."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    schema = None
+    batch = []
+    count = 0
+
+    def flush():
+        nonlocal writer, schema
+        if writer is None:
+            # Header order of the first row fixes the schema
+            schema = pa.schema([(str(name), pa.string()) for name in batch[0]])
+            writer = pq.ParquetWriter(output_path, schema)
+        columns = {
+            name: [None if row.get(name) is None else str(row.get(name)) for row in batch]
+            for name in schema.names
+        }
+        writer.write_table(pa.table(columns, schema=schema))
+        batch.clear()
+
+    try:
+        for row in rows:
+            batch.append({str(key): value for key, value in row.items()})
+            count += 1
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
+    finally:
+        if writer is not None:
+            writer.close()
+    return count
+
+
+WRITERS = {"json": write_json, "jsonl": write_jsonl, "parquet": write_parquet}
+
+
+def convert(xlsx_path, output_path, output_format=None, sheet=None):
+    """
+    Converts a TCD baseline workbook to JSON, JSON Lines or Parquet, streaming row by row.
 
-for row in ws.iter_rows(min_row=2):
-    row_dict = {}
+    Args:
+        xlsx_path (str): Input workbook
+        output_path (str): Output file
+        output_format (str | None): "json", "jsonl" or "parquet"; inferred from output_path if None
+        sheet (str | None): Worksheet name, defaults to the active sheet
 
-    for header, cell in zip(headers, row):
-        value = cell.value
+    Returns:
+        int: Number of rows written
+    """
+    if output_format is None:
+        output_format = os.path.splitext(output_path)[1].lstrip(".").lower() or "json"
+    if output_format not in WRITERS:
+        raise ValueError(f"Unsupported output format '{output_format}', expected one of {sorted(WRITERS)}")
+    return WRITERS[output_format](iter_rows(xlsx_path, sheet=sheet), output_path)
 
-        # Normalize and extract display text if it's a HYPERLINK formula
-        if isinstance(value, str) and "HYPERLINK" in value.upper():
-            normalized = value.lstrip('=').lstrip('=')  # Remove any leading ==
-            match = hyperlink_pattern.search(normalized)
-            if match:
-                value = match.group(1)
 
-        row_dict[header] = value
+def main():
+    parser = argparse.ArgumentParser(description="Convert a TCD baseline XLSX export to JSON, JSON Lines or Parquet.")
+    parser.add_argument("input", nargs="?", default="TCD_Baseline.xlsx", help="Input workbook")
+    parser.add_argument("output", nargs="?", default="tcd_baseline.json", help="Output file")
+    parser.add_argument("--format", choices=sorted(WRITERS), help="Output format (default: from output extension)")
+    parser.add_argument("--sheet", help="Worksheet name (default: active sheet)")
+    args = parser.parse_args()
 
-    data.append(row_dict)
+    count = convert(args.input, args.output, output_format=args.format, sheet=args.sheet)
+    print(f"Saved {count} rows to {args.output}")
 
-# Write JSON
-with open("tcd_baseline.json", "w") as f:
-    json.dump(data, f, indent=4)
 
-print("Saved output.json")
+if __name__ == "__main__":
+    main()